@@ -24,203 +24,300 @@ Usage:
 Run with --help for more details.
 """
 
-import argparse
-import importlib.util
+import functools
+import http.client
+import importlib
+import json
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import urlsplit
 
-# Get scripts directory relative to this file
+try:
+    import orjson
+except ImportError:  # optional; stdlib json is used when it's missing
+    orjson = None
+
+# Get scripts directory relative to this file; scripts are imported from
+# here as top-level modules so they use the regular bytecode cache
 SCRIPTS_DIR = Path(__file__).parent / "scripts"
+_SCRIPTS_DIR = str(SCRIPTS_DIR)
+if _SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, _SCRIPTS_DIR)
+
+# Optional precompiled bundle of scripts/ (see README); when present it
+# is searched first, so scripts load from one zip of bytecode
+SCRIPTS_ZIP = Path(__file__).parent / "scripts.zip"
+if SCRIPTS_ZIP.is_file() and str(SCRIPTS_ZIP) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_ZIP))
+
+RPC_HEADERS = {
+    "Content-Type": "application/json",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept": "application/json",
+}
+
+# Idle keep-alive RPC connections, shared by all threads and keyed by
+# (scheme, host). An http.client connection serves one request at a time,
+# so each request checks one out and returns it when done.
+_rpc_idle = {}
+_rpc_idle_lock = threading.Lock()
+RPC_MAX_IDLE_PER_HOST = 8
+
+# Token unit scales for the decimals used here (USDC: 6, ETH and the rest: 18)
+_DECIMALS = {6: 10 ** 6, 18: 10 ** 18}
 
 
 def load_script(name: str):
-    """Dynamically load a script module."""
-    script_path = SCRIPTS_DIR / f"{name}.py"
-    if not script_path.exists():
+    """Import a script module (cached in sys.modules after the first load)."""
+    # Warm path: no import machinery, no filesystem access
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    
+    try:
+        return importlib.import_module(name)
+    except ModuleNotFoundError as e:
+        if e.name != name:
+            raise
+        script_path = os.path.join(_SCRIPTS_DIR, f"{name}.py")
         print(f"Error: Script not found: {script_path}", file=sys.stderr)
         sys.exit(1)
-    
-    spec = importlib.util.spec_from_file_location(name, script_path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
+
+
+def run_script(name, argv):
+    """Run a script's main() with the given argument list."""
+    module = load_script(name)
+    if hasattr(module, "main"):
+        module.main(argv)
 
 
 def cmd_swap(args):
     """Handle swap subcommand."""
-    # Temporarily modify sys.argv for the script
-    original_argv = sys.argv
-    
     if args.action == "quote":
-        sys.argv = ["cow_swap.py", "quote"]
+        run_script("cow_swap", ["quote"])
     elif args.action == "approve":
-        sys.argv = ["cow_swap.py", "approve"]
+        run_script("cow_swap", ["approve"])
     elif args.action == "execute":
         if args.amount:
-            sys.argv = ["cow_swap.py", "swap", args.amount]
+            run_script("cow_swap", ["swap", args.amount])
         else:
-            sys.argv = ["cow_swap.py", "swap"]
+            run_script("cow_swap", ["swap"])
     else:
         print(f"Unknown swap action: {args.action}")
         print("Use: swap quote|approve|execute [amount]")
         sys.exit(1)
-    
-    try:
-        module = load_script("cow_swap")
-        if hasattr(module, "main"):
-            module.main()
-    finally:
-        sys.argv = original_argv
 
 
 def cmd_bridge(args):
     """Handle bridge subcommand."""
-    original_argv = sys.argv
-    
     if args.action == "quote":
         if not args.amount:
             print("Error: amount required for quote")
             sys.exit(1)
-        sys.argv = ["across_bridge.py", "quote", args.amount]
+        run_script("across_bridge", ["quote", args.amount])
     elif args.action == "execute":
         if not args.amount:
             print("Error: amount required for bridge")
             sys.exit(1)
-        sys.argv = ["across_bridge.py", "bridge", args.amount]
+        run_script("across_bridge", ["bridge", args.amount])
     else:
         print(f"Unknown bridge action: {args.action}")
         print("Use: bridge quote|execute <amount>")
         sys.exit(1)
-    
-    try:
-        module = load_script("across_bridge")
-        if hasattr(module, "main"):
-            module.main()
-    finally:
-        sys.argv = original_argv
 
 
 def cmd_vps(args):
     """Handle VPS subcommand."""
-    original_argv = sys.argv
-    
-    try:
-        if args.action == "register":
-            sys.argv = ["edis_register.py"]
-            module = load_script("edis_register")
-            if hasattr(module, "main"):
-                module.main()
-        elif args.action == "locations":
-            sys.argv = ["edis_order.py", "locations"]
-            module = load_script("edis_order")
-            if hasattr(module, "main"):
-                module.main()
-        elif args.action == "products":
-            sys.argv = ["edis_order.py", "products"]
-            module = load_script("edis_order")
-            if hasattr(module, "main"):
-                module.main()
-        elif args.action == "order":
-            cmd = ["edis_order.py", "order"]
-            if args.location:
-                cmd.extend(["--location", args.location])
-            if args.product:
-                cmd.extend(["--product", args.product])
-            sys.argv = cmd
-            module = load_script("edis_order")
-            if hasattr(module, "main"):
-                module.main()
-        else:
-            print(f"Unknown VPS action: {args.action}")
-            print("Use: vps register|locations|products|order")
-            sys.exit(1)
-    finally:
-        sys.argv = original_argv
+    if args.action == "register":
+        run_script("edis_register", [])
+    elif args.action == "locations":
+        run_script("edis_order", ["locations"])
+    elif args.action == "products":
+        run_script("edis_order", ["products"])
+    elif args.action == "order":
+        cmd = ["order"]
+        if args.location:
+            cmd.extend(["--location", args.location])
+        if args.product:
+            cmd.extend(["--product", args.product])
+        run_script("edis_order", cmd)
+    else:
+        print(f"Unknown VPS action: {args.action}")
+        print("Use: vps register|locations|products|order")
+        sys.exit(1)
 
 
 def cmd_provision(args):
     """Handle provision subcommand."""
-    original_argv = sys.argv
-    
-    try:
-        cmd = ["provision_vps.py"]
-        if args.action:
-            cmd.append(args.action)
-        cmd.append(args.host)
-        if args.user:
-            cmd.extend(["--user", args.user])
-        if args.key:
-            cmd.extend(["--key", args.key])
-        
-        sys.argv = cmd
-        module = load_script("provision_vps")
-        if hasattr(module, "main"):
-            module.main()
-    finally:
-        sys.argv = original_argv
+    cmd = []
+    if args.action:
+        cmd.append(args.action)
+    cmd.append(args.host)
+    if args.user:
+        cmd.extend(["--user", args.user])
+    if args.key:
+        cmd.extend(["--key", args.key])
+    if args.full_upgrade:
+        cmd.append("--full-upgrade")
+    
+    run_script("provision_vps", cmd)
+
+
+@functools.lru_cache(maxsize=1)
+def _read_wallet_address(wallet_file, mtime_ns, size):
+    """Parse the Address line; keyed on the file's stat so edits re-read it."""
+    for line in wallet_file.read_text().splitlines():
+        prefix, sep, rest = line.partition(":")
+        if sep and prefix.strip() == "Address":
+            return rest.strip()
+    return None
 
 
 def get_wallet_address():
-    """Load wallet address from config."""
+    """Load wallet address from config (cached until the file changes)."""
     wallet_file = Path.home() / ".noctiluca" / "private" / "evm_wallet.txt"
-    if not wallet_file.exists():
+    try:
+        stat = wallet_file.stat()
+    except OSError:
         return None
-    
-    for line in wallet_file.read_text().strip().split("\n"):
-        if line.startswith("Address:"):
-            return line.split(":")[1].strip()
-    return None
+    return _read_wallet_address(wallet_file, stat.st_mtime_ns, stat.st_size)
+
+
+def _checkout_connection(scheme, host):
+    """Take an idle connection to an RPC host, or open a new one."""
+    with _rpc_idle_lock:
+        idle = _rpc_idle.get((scheme, host))
+        if idle:
+            return idle.pop()
+    
+    conn_class = (http.client.HTTPSConnection if scheme == "https"
+                  else http.client.HTTPConnection)
+    return conn_class(host, timeout=10)
+
+
+def _checkin_connection(scheme, host, conn):
+    """Return a connection to the idle pool for any thread to reuse."""
+    with _rpc_idle_lock:
+        idle = _rpc_idle.setdefault((scheme, host), [])
+        if len(idle) < RPC_MAX_IDLE_PER_HOST:
+            idle.append(conn)
+            return
+    conn.close()
+
+
+def rpc_post(rpc, payload):
+    """POST a JSON-RPC payload, reusing an open connection to the host."""
+    url = urlsplit(rpc)
+    conn = _checkout_connection(url.scheme, url.netloc)
+    body = orjson.dumps(payload) if orjson else json.dumps(payload).encode()
+    
+    # A reused socket may have been closed by the server while idle;
+    # retry once on a fresh connection in that case
+    reused = conn.sock is not None
+    while True:
+        try:
+            conn.request("POST", url.path or "/", body=body, headers=RPC_HEADERS)
+            resp = conn.getresponse()
+            data = resp.read()
+            break
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            if not reused:
+                raise
+            reused = False
+    
+    _checkin_connection(url.scheme, url.netloc, conn)
+    
+    if resp.status != 200:
+        raise RuntimeError(f"RPC error: HTTP {resp.status}")
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+@functools.lru_cache(maxsize=8)
+def _balance_of_data(address):
+    """ERC20 balanceOf(address) calldata; the wallet is fixed per run."""
+    return "0x70a08231" + address[2:].lower().zfill(64)
+
+
+def _scale(decimals):
+    """Return 10 ** decimals, precomputed for the common token decimals."""
+    scale = _DECIMALS.get(decimals)
+    return scale if scale is not None else 10 ** decimals
+
+
+def _balance_request(address, token=None, request_id=1):
+    """Build the JSON-RPC request for a native or ERC20 balance."""
+    if token is None:
+        # Native balance
+        return {
+            "jsonrpc": "2.0",
+            "method": "eth_getBalance",
+            "params": [address, "latest"],
+            "id": request_id
+        }
+    # ERC20 balance
+    return {
+        "jsonrpc": "2.0",
+        "method": "eth_call",
+        "params": [{"to": token, "data": _balance_of_data(address)}, "latest"],
+        "id": request_id
+    }
 
 
 def get_balance(rpc, address, token=None, decimals=18):
     """Get balance via RPC."""
-    import json
-    import urllib.request
-    
     try:
-        if token is None:
-            # Native balance
-            data = {
-                "jsonrpc": "2.0",
-                "method": "eth_getBalance",
-                "params": [address, "latest"],
-                "id": 1
-            }
-        else:
-            # ERC20 balance
-            call_data = "0x70a08231" + address[2:].lower().zfill(64)
-            data = {
-                "jsonrpc": "2.0",
-                "method": "eth_call",
-                "params": [{"to": token, "data": call_data}, "latest"],
-                "id": 1
-            }
-        
-        req = urllib.request.Request(
-            rpc,
-            data=json.dumps(data).encode(),
-            headers={
-                "Content-Type": "application/json",
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "Accept": "application/json",
-            }
-        )
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            result = json.load(resp)
-            if "result" in result:
-                raw = int(result["result"], 16)
-                return raw / (10 ** decimals)
+        result = rpc_post(rpc, _balance_request(address, token))
+        if "result" in result:
+            raw = int(result["result"], 16)
+            return raw / _scale(decimals)
     except Exception:
         return None
     return None
 
 
+def get_balances_batch(rpc, address, tokens):
+    """Get several balances from one RPC in a single batched request.
+    
+    tokens is a list of (name, token_address, decimals) tuples, with
+    token_address None for the native balance. Returns a dict mapping
+    each name to its balance, or None where the lookup failed.
+    """
+    batch = [
+        _balance_request(address, token_addr, request_id)
+        for request_id, (_, token_addr, _) in enumerate(tokens, 1)
+    ]
+    
+    try:
+        responses = rpc_post(rpc, batch)
+    except Exception:
+        return {name: None for name, _, _ in tokens}
+    
+    if not isinstance(responses, list):
+        # Endpoint rejected the batch - query tokens one at a time
+        return {
+            name: get_balance(rpc, address, token_addr, decimals)
+            for name, token_addr, decimals in tokens
+        }
+    
+    by_id = {resp.get("id"): resp for resp in responses if isinstance(resp, dict)}
+    balances = {}
+    for request_id, (name, _, decimals) in enumerate(tokens, 1):
+        resp = by_id.get(request_id, {})
+        try:
+            balances[name] = int(resp["result"], 16) / _scale(decimals)
+        except (KeyError, TypeError, ValueError):
+            balances[name] = None
+    return balances
+
+
 def cmd_balance(args):
     """Check wallet balances across networks."""
-    import json
-    import urllib.request
-    
     address = get_wallet_address()
     if not address:
         print("Error: No wallet found at ~/.noctiluca/private/evm_wallet.txt")
@@ -247,12 +344,27 @@ def cmd_balance(args):
         }
     }
     
-    # Check all balances
+    # One batched request per network, with the networks queried
+    # concurrently - two round-trips in total, overlapped
+    with ThreadPoolExecutor(max_workers=len(networks)) as executor:
+        futures = {
+            network_name: executor.submit(
+                get_balances_batch,
+                config["rpc"],
+                address,
+                [
+                    (token_name, token_addr, 6 if "USDC" in token_name else 18)
+                    for token_name, token_addr in config["tokens"].items()
+                ],
+            )
+            for network_name, config in networks.items()
+        }
+    
     for network_name, config in networks.items():
         print(f"=== {network_name} ===")
-        for token_name, token_addr in config["tokens"].items():
-            decimals = 6 if "USDC" in token_name else 18
-            balance = get_balance(config["rpc"], address, token_addr, decimals)
+        balances = futures[network_name].result()
+        for token_name in config["tokens"]:
+            balance = balances[token_name]
             if balance is not None:
                 if balance > 0.0001 or "USDC" in token_name:
                     print(f"  {token_name}: {balance:.6f}")
@@ -263,79 +375,97 @@ def cmd_balance(args):
         print()
 
 
-def cmd_status(args):
-    """Show comprehensive infrastructure status."""
-    import json
-    import urllib.request
-    from datetime import datetime, timezone
+def gather_status():
+    """Collect everything the status dashboard shows (all of the I/O)."""
+    state = {
+        "time": datetime.now(timezone.utc),
+        "address": get_wallet_address(),
+        "polygon_usdc": None,
+        "base_eth": None,
+        "edis": "missing",
+    }
     
+    # Balances (Polygon USDC is primary for VPS) - no wallet, no RPC calls
+    if state["address"]:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            usdc_future = executor.submit(
+                get_balance,
+                "https://polygon-bor-rpc.publicnode.com",
+                state["address"],
+                "0x3c499c542cEF5E3811e1192ce70d8cC03d5c3359",
+                6
+            )
+            eth_future = executor.submit(
+                get_balance, "https://base-rpc.publicnode.com", state["address"], None, 18
+            )
+        state["polygon_usdc"] = usdc_future.result()
+        state["base_eth"] = eth_future.result()
+    
+    # EDIS credentials - only the email:password line matters, so read
+    # just the head of the file
+    edis_creds = Path.home() / ".noctiluca" / "private" / "edis.txt"
+    try:
+        with edis_creds.open("rb") as f:
+            head = f.read(4096)
+    except FileNotFoundError:
+        pass
+    else:
+        first_line = head.lstrip().split(b"\n", 1)[0]
+        state["edis"] = "ok" if b":" in first_line else "invalid"
+    
+    return state
+
+
+def render_status(state):
+    """Print the status dashboard for a gather_status() result."""
     print("=" * 60)
     print("  NOCTILUCA INFRASTRUCTURE STATUS")
-    print(f"  {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')} UTC")
+    print(f"  {state['time'].strftime('%Y-%m-%d %H:%M:%S')} UTC")
     print("=" * 60)
     print()
     
-    checks = []
     warnings = []
     
     # 1. Wallet check
-    address = get_wallet_address()
-    if address:
+    address = state["address"]
+    wallet_ok = bool(address)
+    if wallet_ok:
         print(f"✅ Wallet: {address[:10]}...{address[-8:]}")
-        checks.append(("Wallet", True))
     else:
         print("❌ Wallet: Not configured")
-        checks.append(("Wallet", False))
         warnings.append("Create wallet: save address/key to ~/.noctiluca/private/evm_wallet.txt")
     
-    # 2. Balance check (Polygon USDC is primary for VPS)
-    polygon_usdc = None
-    if address:
-        polygon_usdc = get_balance(
-            "https://polygon-bor-rpc.publicnode.com",
-            address,
-            "0x3c499c542cEF5E3811e1192ce70d8cC03d5c3359",
-            6
-        )
-        base_eth = get_balance("https://base-rpc.publicnode.com", address, None, 18)
-        
+    # 2. Balance check (only queried when there is a wallet)
+    funds_ok = False
+    if wallet_ok:
+        polygon_usdc = state["polygon_usdc"]
         if polygon_usdc is not None and polygon_usdc >= 4.50:
             print(f"✅ Polygon USDC: ${polygon_usdc:.2f} (enough for VPS)")
-            checks.append(("Funds", True))
+            funds_ok = True
         elif polygon_usdc is not None:
             print(f"⚠️  Polygon USDC: ${polygon_usdc:.2f} (need $4.50+ for VPS)")
-            checks.append(("Funds", False))
             warnings.append("Bridge more USDC to Polygon for VPS payment")
         else:
             print("❌ Polygon USDC: (RPC error)")
-            checks.append(("Funds", None))
+            funds_ok = None
         
-        if base_eth is not None:
-            print(f"   Base ETH: {base_eth:.6f}")
+        if state["base_eth"] is not None:
+            print(f"   Base ETH: {state['base_eth']:.6f}")
     
     # 3. EDIS credentials check
-    edis_creds = Path.home() / ".noctiluca" / "private" / "edis.txt"
-    if edis_creds.exists():
-        creds = edis_creds.read_text().strip()
-        if ":" in creds:
-            print("✅ EDIS Account: Credentials saved")
-            checks.append(("EDIS Account", True))
-        else:
-            print("⚠️  EDIS Account: Invalid format in edis.txt")
-            checks.append(("EDIS Account", False))
+    edis_ok = state["edis"] == "ok"
+    if state["edis"] == "ok":
+        print("✅ EDIS Account: Credentials saved")
+    elif state["edis"] == "invalid":
+        print("⚠️  EDIS Account: Invalid format in edis.txt")
     else:
         print("⚠️  EDIS Account: Not registered")
-        checks.append(("EDIS Account", False))
         warnings.append("Register at https://manage.edisglobal.com/register.php (needs CAPTCHA)")
     
     # 4. VPS readiness summary
     print()
     print("-" * 40)
     
-    wallet_ok = checks[0][1]
-    funds_ok = checks[1][1] if len(checks) > 1 else False
-    edis_ok = checks[2][1] if len(checks) > 2 else False
-    
     if wallet_ok and funds_ok and edis_ok:
         print("🚀 VPS READY: All prerequisites met!")
         print("   Run: ./noctiluca_tools.py vps order")
@@ -360,51 +490,38 @@ def cmd_status(args):
     print("=" * 60)
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Noctiluca Tools - AI Agent Infrastructure CLI",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-Examples:
-  %(prog)s status                     Show infrastructure readiness
-  %(prog)s balance                    Check wallet balances
-  %(prog)s swap quote                 Get WETH→USDC swap quote
-  %(prog)s swap approve               Approve WETH for trading (one-time)
-  %(prog)s swap execute               Swap all WETH to USDC
-  %(prog)s bridge quote 50            Get quote for bridging 50 USDC
-  %(prog)s bridge execute 50          Bridge 50 USDC Base→Polygon
-  %(prog)s vps locations              List EDIS Global locations
-  %(prog)s vps order                  Order a VPS
+def cmd_status(args):
+    """Show comprehensive infrastructure status."""
+    render_status(gather_status())
 
-More info: https://github.com/NoctilucaClaw/noctiluca-tools
-        """
-    )
-    
-    subparsers = parser.add_subparsers(dest="command", help="Command to run")
-    
-    # Status command
+
+def _add_status_parser(subparsers):
     status_parser = subparsers.add_parser("status", help="Show infrastructure status")
     status_parser.set_defaults(func=cmd_status)
-    
-    # Balance command
+
+
+def _add_balance_parser(subparsers):
     balance_parser = subparsers.add_parser("balance", help="Check wallet balances")
     balance_parser.set_defaults(func=cmd_balance)
-    
-    # Swap command
+
+
+def _add_swap_parser(subparsers):
     swap_parser = subparsers.add_parser("swap", help="Token swaps via CoW Protocol")
     swap_parser.add_argument("action", choices=["quote", "approve", "execute"],
                             help="Action to perform")
     swap_parser.add_argument("amount", nargs="?", help="Amount in WETH (default: all)")
     swap_parser.set_defaults(func=cmd_swap)
-    
-    # Bridge command
+
+
+def _add_bridge_parser(subparsers):
     bridge_parser = subparsers.add_parser("bridge", help="Cross-chain bridging")
     bridge_parser.add_argument("action", choices=["quote", "execute"],
                               help="Action to perform")
     bridge_parser.add_argument("amount", nargs="?", help="Amount in USDC")
     bridge_parser.set_defaults(func=cmd_bridge)
-    
-    # VPS command
+
+
+def _add_vps_parser(subparsers):
     vps_parser = subparsers.add_parser("vps", help="EDIS Global VPS management")
     vps_parser.add_argument("action", 
                            choices=["register", "locations", "products", "order"],
@@ -412,8 +529,9 @@ More info: https://github.com/NoctilucaClaw/noctiluca-tools
     vps_parser.add_argument("--location", help="Location ID for order")
     vps_parser.add_argument("--product", help="Product ID for order")
     vps_parser.set_defaults(func=cmd_vps)
-    
-    # Provision command
+
+
+def _add_provision_parser(subparsers):
     provision_parser = subparsers.add_parser("provision", 
                                              help="Provision a fresh VPS")
     provision_parser.add_argument("action", nargs="?",
@@ -424,9 +542,105 @@ More info: https://github.com/NoctilucaClaw/noctiluca-tools
     provision_parser.add_argument("--user", "-u", default="root",
                                  help="SSH user (default: root)")
     provision_parser.add_argument("--key", "-i", help="Path to SSH private key")
+    provision_parser.add_argument("--full-upgrade", action="store_true",
+                                 help="Also upgrade all installed packages")
     provision_parser.set_defaults(func=cmd_provision)
+
+
+# Subcommand parser factories, in help order
+COMMANDS = {
+    "status": _add_status_parser,
+    "balance": _add_balance_parser,
+    "swap": _add_swap_parser,
+    "bridge": _add_bridge_parser,
+    "vps": _add_vps_parser,
+    "provision": _add_provision_parser,
+}
+
+
+def build_parser(commands=None):
+    """Build the CLI parser with the given subcommands (default: all)."""
+    import argparse
     
-    args = parser.parse_args()
+    parser = argparse.ArgumentParser(
+        description="Noctiluca Tools - AI Agent Infrastructure CLI",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s status                     Show infrastructure readiness
+  %(prog)s balance                    Check wallet balances
+  %(prog)s swap quote                 Get WETH→USDC swap quote
+  %(prog)s swap approve               Approve WETH for trading (one-time)
+  %(prog)s swap execute               Swap all WETH to USDC
+  %(prog)s bridge quote 50            Get quote for bridging 50 USDC
+  %(prog)s bridge execute 50          Bridge 50 USDC Base→Polygon
+  %(prog)s vps locations              List EDIS Global locations
+  %(prog)s vps order                  Order a VPS
+
+More info: https://github.com/NoctilucaClaw/noctiluca-tools
+        """
+    )
+    
+    subparsers = parser.add_subparsers(dest="command", help="Command to run")
+    for name in commands or COMMANDS:
+        COMMANDS[name](subparsers)
+    return parser
+
+
+SWAP_ACTIONS = frozenset({"quote", "approve", "execute"})
+BRIDGE_ACTIONS = frozenset({"quote", "execute"})
+VPS_ACTIONS = frozenset({"register", "locations", "products", "order"})
+PROVISION_ACTIONS = frozenset({"provision", "check", "setup-keys"})
+
+
+def fast_parse(argv):
+    """Parse the common plain invocations without argparse.
+    
+    Returns the same namespace argparse would, or None when the arguments
+    need the full parser (options, --help, or anything invalid).
+    """
+    if not argv or any(arg.startswith("-") for arg in argv):
+        return None
+    
+    command, rest = argv[0], argv[1:]
+    
+    if command == "status" and not rest:
+        return SimpleNamespace(command=command, func=cmd_status)
+    if command == "balance" and not rest:
+        return SimpleNamespace(command=command, func=cmd_balance)
+    if command == "swap" and 1 <= len(rest) <= 2 and rest[0] in SWAP_ACTIONS:
+        return SimpleNamespace(command=command, func=cmd_swap, action=rest[0],
+                               amount=rest[1] if len(rest) > 1 else None)
+    if command == "bridge" and 1 <= len(rest) <= 2 and rest[0] in BRIDGE_ACTIONS:
+        return SimpleNamespace(command=command, func=cmd_bridge, action=rest[0],
+                               amount=rest[1] if len(rest) > 1 else None)
+    if command == "vps" and len(rest) == 1 and rest[0] in VPS_ACTIONS:
+        return SimpleNamespace(command=command, func=cmd_vps, action=rest[0],
+                               location=None, product=None)
+    if command == "provision" and len(rest) == 1:
+        return SimpleNamespace(command=command, func=cmd_provision,
+                               action="provision", host=rest[0],
+                               user="root", key=None, full_upgrade=False)
+    if command == "provision" and len(rest) == 2 and rest[0] in PROVISION_ACTIONS:
+        return SimpleNamespace(command=command, func=cmd_provision,
+                               action=rest[0], host=rest[1],
+                               user="root", key=None, full_upgrade=False)
+    return None
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = fast_parse(argv)
+    if args is not None:
+        args.func(args)
+        return
+    
+    # Only the requested subcommand needs a parser; build every one when
+    # there is no known command (top-level help, errors)
+    command = argv[0] if argv else None
+    parser = build_parser([command] if command in COMMANDS else None)
+    
+    args = parser.parse_args(argv)
     
     if not args.command:
         parser.print_help()
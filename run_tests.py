@@ -1,6 +1,12 @@
 #!/usr/bin/env python3
-"""Test runner for noctiluca-tools."""
+"""Test runner for noctiluca-tools.
+
+Usage:
+  python3 run_tests.py              # unittest discovery, serial
+  python3 run_tests.py --parallel   # pytest-xdist across all CPUs
+"""
 import unittest
+import subprocess
 import sys
 import os
 
@@ -21,5 +27,18 @@ def run_tests():
     
     return 0 if result.wasSuccessful() else 1
 
+def run_tests_parallel():
+    """Run all tests with pytest, collecting and running across workers."""
+    try:
+        import xdist  # noqa: F401 (pytest-xdist)
+    except ImportError:
+        print("❌ --parallel requires pytest-xdist")
+        print("Run: pip3 install pytest pytest-xdist")
+        return 1
+    
+    return subprocess.call([sys.executable, "-m", "pytest", "-n", "auto", "tests/"])
+
 if __name__ == '__main__':
+    if "--parallel" in sys.argv:
+        sys.exit(run_tests_parallel())
     sys.exit(run_tests())
@@ -5,11 +5,20 @@ Bridge USDC from Base to Polygon for VPS payment
 """
 
 import os
+import re
 import sys
 import json
-import requests
-from web3 import Web3
-from eth_account import Account
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+# web3, eth_account and requests are imported where they are used, so that
+# --help doesn't pay for loading them
+
+try:
+    import orjson
+except ImportError:  # optional; stdlib json is used when it's missing
+    orjson = None
 
 # Chain IDs
 BASE_CHAIN_ID = 8453
@@ -25,6 +34,12 @@ BASE_RPC = "https://base.publicnode.com"
 # Across API
 ACROSS_API = "https://app.across.to/api"
 
+# Seconds between receipt polls; Base produces a block every ~2s
+RECEIPT_POLL_LATENCY = 1
+
+# Floor for maxPriorityFeePerGas, in wei (0.001 gwei)
+MIN_PRIORITY_FEE = 1_000_000
+
 # ERC20 ABI (minimal)
 ERC20_ABI = [
     {"constant": True, "inputs": [{"name": "_owner", "type": "address"}], "name": "balanceOf", "outputs": [{"name": "balance", "type": "uint256"}], "type": "function"},
@@ -34,30 +49,47 @@ ERC20_ABI = [
 ]
 
 
+PRIVATE_KEY_RE = re.compile(r'^Private Key:(.*)$', re.MULTILINE)
+
+
+@functools.lru_cache(maxsize=16)
+def _cs(address):
+    """Checksum an address; the few distinct ones (SpokePool, USDC) are cached"""
+    from web3 import Web3
+    return Web3.to_checksum_address(address)
+
+
+@functools.lru_cache(maxsize=1)
 def load_wallet():
-    """Load wallet from private key file"""
+    """Load wallet from private key file (derived once per process)"""
+    from eth_account import Account
+    
     key_file = os.path.expanduser("~/.noctiluca/private/evm_wallet.txt")
     with open(key_file, 'r') as f:
         content = f.read()
     
-    for line in content.split('\n'):
-        if line.startswith('Private Key:'):
-            pk = line.split(':', 1)[1].strip()
-            if not pk.startswith('0x'):
-                pk = '0x' + pk
-            return Account.from_key(pk)
+    match = PRIVATE_KEY_RE.search(content)
+    if match:
+        pk = match.group(1).strip()
+        if not pk.startswith('0x'):
+            pk = '0x' + pk
+        return Account.from_key(pk)
     raise ValueError("Private key not found")
 
 
 def get_balances(w3, account, usdc_contract):
-    """Get ETH and USDC balances"""
-    eth_balance = w3.eth.get_balance(account.address)
-    usdc_balance = usdc_contract.functions.balanceOf(account.address).call()
-    return eth_balance, usdc_balance
+    """Get ETH and USDC balances (both RPC reads run concurrently)"""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        eth_future = executor.submit(w3.eth.get_balance, account.address)
+        usdc_future = executor.submit(
+            usdc_contract.functions.balanceOf(account.address).call)
+    return eth_future.result(), usdc_future.result()
 
 
 def get_quote(amount_wei, depositor):
     """Get bridge quote from Across API"""
+    import requests
+    
     url = f"{ACROSS_API}/swap/approval"
     
     params = {
@@ -83,7 +115,32 @@ def get_quote(amount_wei, depositor):
         print(resp.text)
         return None
     
-    return resp.json()
+    return orjson.loads(resp.content) if orjson else resp.json()
+
+
+def get_fee_suggestion(w3):
+    """Suggest EIP-1559 fees from one eth_feeHistory call.
+    
+    Uses the next block's base fee and the median tip of the last 5 blocks
+    (never below 0.001 gwei); maxFeePerGas leaves room for the base fee to
+    double. Falls back to the eth_gasPrice heuristic if feeHistory fails.
+    """
+    min_priority = MIN_PRIORITY_FEE
+    try:
+        history = w3.eth.fee_history(5, 'latest', [50])
+        base_fee = history['baseFeePerGas'][-1]
+        tips = sorted(reward[0] for reward in history['reward'])
+        priority = max(tips[len(tips) // 2], min_priority) if tips else min_priority
+    except Exception as e:
+        print(f"   Fee history unavailable, using gas price: {e}")
+        return {
+            'maxFeePerGas': w3.eth.gas_price * 2,
+            'maxPriorityFeePerGas': min_priority,
+        }
+    return {
+        'maxFeePerGas': 2 * base_fee + priority,
+        'maxPriorityFeePerGas': priority,
+    }
 
 
 def execute_bridge(w3, account, quote_data):
@@ -100,26 +157,31 @@ def execute_bridge(w3, account, quote_data):
     # Get current nonce
     nonce = w3.eth.get_transaction_count(account.address)
     
+    # Fields shared by every transaction; only to/data/value/gas/nonce vary
+    tx_template = {
+        **get_fee_suggestion(w3),
+        'chainId': BASE_CHAIN_ID,
+    }
+    
     # Execute approval transactions first
     for i, approval in enumerate(approval_txns):
         print(f"\n🔐 Executing approval {i+1}/{len(approval_txns)}...")
         
         tx = {
-            'to': Web3.to_checksum_address(approval['to']),
+            **tx_template,
+            'to': _cs(approval['to']),
             'data': approval['data'],
             'value': int(approval.get('value', 0)),
             'gas': 100000,
-            'maxFeePerGas': w3.eth.gas_price * 2,
-            'maxPriorityFeePerGas': w3.to_wei(0.001, 'gwei'),
             'nonce': nonce,
-            'chainId': BASE_CHAIN_ID,
         }
         
         signed = account.sign_transaction(tx)
         tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
         print(f"   TX: {tx_hash.hex()}")
         
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+        receipt = w3.eth.wait_for_transaction_receipt(
+            tx_hash, timeout=120, poll_latency=RECEIPT_POLL_LATENCY)
         if receipt['status'] != 1:
             print(f"❌ Approval failed!")
             return False
@@ -131,14 +193,12 @@ def execute_bridge(w3, account, quote_data):
         print(f"\n🌉 Executing bridge transaction...")
         
         tx = {
-            'to': Web3.to_checksum_address(bridge_txn['to']),
+            **tx_template,
+            'to': _cs(bridge_txn['to']),
             'data': bridge_txn['data'],
             'value': int(bridge_txn.get('value', 0)),
             'gas': 300000,
-            'maxFeePerGas': w3.eth.gas_price * 2,
-            'maxPriorityFeePerGas': w3.to_wei(0.001, 'gwei'),
             'nonce': nonce,
-            'chainId': BASE_CHAIN_ID,
         }
         
         # Estimate gas
@@ -154,7 +214,8 @@ def execute_bridge(w3, account, quote_data):
         print(f"   TX: {tx_hash.hex()}")
         print(f"   BaseScan: https://basescan.org/tx/{tx_hash.hex()}")
         
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+        receipt = w3.eth.wait_for_transaction_receipt(
+            tx_hash, timeout=120, poll_latency=RECEIPT_POLL_LATENCY)
         if receipt['status'] != 1:
             print(f"❌ Bridge failed!")
             return False
@@ -166,12 +227,9 @@ def execute_bridge(w3, account, quote_data):
     return False
 
 
-def main():
-    print("=" * 60)
-    print("🌉 Across Protocol Bridge: Base USDC → Polygon USDC")
-    print("=" * 60)
-    
-    if "--help" in sys.argv or "-h" in sys.argv:
+def parse_args(argv):
+    """Parse command-line flags; pure apart from printing --help"""
+    if "--help" in argv or "-h" in argv:
         print("\nUsage: python3 across_bridge.py [OPTIONS]")
         print("\nOptions:")
         print("  --execute, -x    Execute the bridge (required to actually bridge)")
@@ -179,6 +237,13 @@ def main():
         print("\nWithout --execute, shows quote only (dry run).")
         sys.exit(0)
     
+    return SimpleNamespace(execute="--execute" in argv or "-x" in argv)
+
+
+def run(args):
+    """Load the wallet, connect to Base, quote and (with --execute) bridge"""
+    from web3 import Web3
+    
     # Load wallet
     account = load_wallet()
     print(f"\n💳 Wallet: {account.address}")
@@ -191,7 +256,7 @@ def main():
     print(f"✅ Connected to Base (Chain ID: {w3.eth.chain_id})")
     
     # Get USDC contract
-    usdc = w3.eth.contract(address=Web3.to_checksum_address(BASE_USDC), abi=ERC20_ABI)
+    usdc = w3.eth.contract(address=_cs(BASE_USDC), abi=ERC20_ABI)
     
     # Get balances
     eth_balance, usdc_balance = get_balances(w3, account, usdc)
@@ -224,10 +289,7 @@ def main():
         fee = (bridge_amount - expected) / 1e6
         print(f"   Bridge fee: ~${fee:.4f}")
     
-    # Check for auto-execute flag
-    auto_execute = "--execute" in sys.argv or "-x" in sys.argv
-    
-    if not auto_execute:
+    if not args.execute:
         print("\n" + "=" * 60)
         print("Run with --execute or -x flag to execute the bridge")
         print("Example: python3 across_bridge.py --execute")
@@ -246,5 +308,15 @@ def main():
         sys.exit(1)
 
 
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    
+    print("=" * 60)
+    print("🌉 Across Protocol Bridge: Base USDC → Polygon USDC")
+    print("=" * 60)
+    
+    run(parse_args(argv))
+
+
 if __name__ == "__main__":
     main()
@@ -15,13 +15,25 @@ Environment:
   Or reads from ~/.noctiluca/private/evm_wallet.txt
 """
 
+import functools
 import json
 import os
+import queue
+import re
 import sys
+import threading
 import time
 import urllib.request
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional; stdlib json is used when it's missing
+    orjson = None
+
+# Response bodies may be bytes; orjson parses them without decoding first
+json_loads = orjson.loads if orjson else json.loads
+
 # Base chain constants
 BASE_CHAIN_ID = 8453
 COW_API = "https://api.cow.fi/base/api/v1"
@@ -29,6 +41,27 @@ WETH = "0x4200000000000000000000000000000000000006"
 USDC = "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913"
 COW_VAULT = "0xC92E8bdf79f0507f65a392b0ab4667716BFE0110"
 
+@functools.lru_cache(maxsize=8)
+def _abi_address(address):
+    """ABI-encode an address as a 32-byte word (cached; a run uses only a few)."""
+    return bytes.fromhex(address[2:]).rjust(32, b"\0")
+
+# ERC20 function selectors and the constant approve(COW_VAULT, max) calldata
+_BALANCEOF_SELECTOR = bytes.fromhex("70a08231")
+_ALLOWANCE_SELECTOR = bytes.fromhex("dd62ed3e")
+_APPROVE_SELECTOR = bytes.fromhex("095ea7b3")
+_APPROVE_MAX_CALLDATA = _APPROVE_SELECTOR + _abi_address(COW_VAULT) + b"\xff" * 32
+
+# Used in "Run: ..." hints so they name this script even when invoked
+# through noctiluca_tools.py (or loaded from the scripts.zip bundle)
+SCRIPT_NAME = "cow_swap.py"
+
+# newHeads subscriptions for wait_for_tx (needs the optional websockets package)
+WS_URL = "wss://base-rpc.publicnode.com"
+# Longest wait for a pushed block (~2 Base block times) before checking the
+# receipt anyway, in case the subscription silently stalls
+WS_RECV_TIMEOUT = 4
+
 # Ordered by reliability (tested 2026-02-08)
 # llamarpc returns wrong data, meowrpc doesn't support eth_call
 RPC_URLS = [
@@ -37,41 +70,180 @@ RPC_URLS = [
     "https://base-rpc.publicnode.com",
 ]
 
-def rpc_call(method, params):
-    """Make RPC call, trying multiple endpoints."""
-    data = {"jsonrpc": "2.0", "method": method, "params": params, "id": 1}
-    headers = {
-        "Content-Type": "application/json",
-        "User-Agent": "Mozilla/5.0 (compatible; NoctilucaBot/1.0)",
-    }
+RPC_HEADERS = {
+    "Content-Type": "application/json",
+    "User-Agent": "Mozilla/5.0 (compatible; NoctilucaBot/1.0)",
+}
+
+# Seconds to wait on the endpoints already queried before also trying the
+# next one in RPC_URLS (hedged requests)
+HEDGE_DELAY = 0.5
+
+# Parameterless methods whose responses are reused for a few seconds
+RPC_CACHE_TTL = {"eth_gasPrice": 5}
+_rpc_cache = {}  # method -> (monotonic time, response)
+
+_session = None
+
+def get_session():
+    """Shared keep-alive HTTP session for RPC calls (created on first use)."""
+    global _session
+    if _session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        _session = requests.Session()
+        _session.headers.update(RPC_HEADERS)
+        _session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    return _session
+
+def rpc_post(rpc, data):
+    """POST a JSON-RPC payload over the shared session; return the decoded reply."""
+    resp = get_session().post(rpc, data=json.dumps(data), timeout=15)
+    resp.raise_for_status()
+    return json_loads(resp.content)
+
+def _local_response(method):
+    """Answer a call without a round-trip where possible, else None."""
+    if method == "eth_chainId":
+        # Constant for the chain we talk to
+        return {"jsonrpc": "2.0", "id": 1, "result": hex(BASE_CHAIN_ID)}
+    ttl = RPC_CACHE_TTL.get(method)
+    if ttl:
+        cached = _rpc_cache.get(method)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+    return None
+
+def _remember(method, response):
+    """Cache a response if its method has a TTL."""
+    if method in RPC_CACHE_TTL:
+        _rpc_cache[method] = (time.monotonic(), response)
+
+def rpc_hedged(attempt):
+    """Run attempt(rpc) against RPC_URLS as hedged requests.
+    
+    The first endpoint is queried immediately; each further endpoint is
+    started when HEDGE_DELAY passes without an answer, or as soon as an
+    earlier attempt fails. Returns the first successful result and
+    abandons the stragglers (daemon threads, so they never delay exit).
+    """
+    results = queue.Queue()
+    
+    def run(rpc):
+        try:
+            results.put((True, attempt(rpc)))
+        except Exception as e:
+            results.put((False, e))
+    
+    pending = list(RPC_URLS)
+    outstanding = 0
+    last_error = None
+    while pending or outstanding:
+        if pending:
+            threading.Thread(target=run, args=(pending.pop(0),), daemon=True).start()
+            outstanding += 1
+        try:
+            ok, value = results.get(timeout=HEDGE_DELAY if pending else None)
+        except queue.Empty:
+            continue
+        outstanding -= 1
+        if ok:
+            return value
+        last_error = value
+    raise Exception(f"All RPCs failed: {last_error}")
+
+def rpc_serial(data):
+    """POST data to RPC_URLS in turn, moving on only when an endpoint is unreachable.
+    
+    For calls that must not be sent twice: an endpoint that answers, even
+    with an error, is the answer.
+    """
     last_error = None
     for rpc in RPC_URLS:
         try:
-            req = urllib.request.Request(rpc,
-                data=json.dumps(data).encode(),
-                headers=headers)
-            resp = urllib.request.urlopen(req, timeout=15)
-            result = json.loads(resp.read())
-            if "error" in result:
-                last_error = result["error"]
-                continue
-            return result
+            result = rpc_post(rpc, data)
         except Exception as e:
-            last_error = str(e)
+            last_error = e
             continue
+        if "error" in result:
+            raise Exception(result["error"])
+        return result
     raise Exception(f"All RPCs failed: {last_error}")
 
+def rpc_call(method, params, hedge=True):
+    """Make RPC call, hedged across multiple endpoints.
+    
+    Pass hedge=False for writes (eth_sendRawTransaction): they go to one
+    endpoint at a time via rpc_serial instead.
+    """
+    local = _local_response(method)
+    if local is not None:
+        return local
+    
+    data = {"jsonrpc": "2.0", "method": method, "params": params, "id": 1}
+    if not hedge:
+        return rpc_serial(data)
+    
+    def attempt(rpc):
+        result = rpc_post(rpc, data)
+        if "error" in result:
+            raise Exception(result["error"])
+        return result
+    
+    result = rpc_hedged(attempt)
+    _remember(method, result)
+    return result
+
+def rpc_batch(calls):
+    """Make several RPC calls in one JSON-RPC batch request.
+    
+    calls is a list of (method, params) tuples; returns the response
+    objects in the same order. Some providers reject batches, so if no
+    endpoint answers the whole batch, falls back to one rpc_call each.
+    """
+    responses = [_local_response(method) for method, _ in calls]
+    pending = [i for i, resp in enumerate(responses) if resp is None]
+    if not pending:
+        return responses
+    
+    data = [
+        {"jsonrpc": "2.0", "method": calls[i][0], "params": calls[i][1], "id": i}
+        for i in pending
+    ]
+    
+    def attempt(rpc):
+        results = rpc_post(rpc, data)
+        if not isinstance(results, list):
+            raise Exception(f"Batch rejected: {results}")
+        by_id = {r.get("id"): r for r in results if isinstance(r, dict)}
+        if not all(i in by_id and "error" not in by_id[i] for i in pending):
+            raise Exception("Incomplete batch response")
+        return by_id
+    
+    try:
+        by_id = rpc_hedged(attempt)
+    except Exception:
+        for i in pending:
+            responses[i] = rpc_call(*calls[i])
+        return responses
+    
+    for i in pending:
+        responses[i] = by_id[i]
+        _remember(calls[i][0], by_id[i])
+    return responses
+
+PRIVATE_KEY_RE = re.compile(r'^Private Key:(.*)$', re.MULTILINE)
+
+@functools.lru_cache(maxsize=1)
 def get_wallet():
-    """Load wallet from env or file."""
+    """Load wallet from env or file (the key is derived once per process)."""
     pk = os.environ.get("EVM_PRIVATE_KEY")
     if not pk:
         keyfile = Path.home() / ".noctiluca/private/evm_wallet.txt"
         if keyfile.exists():
-            content = keyfile.read_text()
-            for line in content.split('\n'):
-                if line.startswith('Private Key:'):
-                    pk = line.split(':', 1)[1].strip()
-                    break
+            match = PRIVATE_KEY_RE.search(keyfile.read_text())
+            if match:
+                pk = match.group(1).strip()
     if not pk:
         raise ValueError("No private key found")
     
@@ -80,53 +252,113 @@ def get_wallet():
         pk = '0x' + pk
     return Account.from_key(pk)
 
-def get_weth_balance(address):
-    """Query WETH balance on Base."""
-    result = rpc_call("eth_call", [{
+# (method, params) builders for the read-only queries, shared by the
+# single-call helpers below and the batched preflight checks
+
+def weth_balance_call(address):
+    """WETH balanceOf(address) on Base."""
+    return ("eth_call", [{
         "to": WETH,
-        "data": f"0x70a08231000000000000000000000000{address[2:].lower()}"
+        "data": "0x" + (_BALANCEOF_SELECTOR + _abi_address(address)).hex()
     }, "latest"])
-    return int(result["result"], 16)
 
-def get_eth_balance(address):
-    """Query ETH balance on Base."""
-    result = rpc_call("eth_getBalance", [address, "latest"])
-    return int(result["result"], 16)
+def eth_balance_call(address):
+    """ETH balance on Base."""
+    return ("eth_getBalance", [address, "latest"])
 
-def check_allowance(owner, spender):
-    """Check WETH allowance for CoW vault."""
-    result = rpc_call("eth_call", [{
+def allowance_call(owner, spender):
+    """WETH allowance(owner, spender)."""
+    return ("eth_call", [{
         "to": WETH,
-        "data": f"0xdd62ed3e000000000000000000000000{owner[2:].lower()}000000000000000000000000{spender[2:].lower()}"
+        "data": "0x" + (_ALLOWANCE_SELECTOR + _abi_address(owner) + _abi_address(spender)).hex()
     }, "latest"])
-    return int(result["result"], 16)
 
-def get_gas_price():
-    """Get current gas price."""
-    result = rpc_call("eth_gasPrice", [])
+def gas_price_call():
+    """Current gas price."""
+    return ("eth_gasPrice", [])
+
+def nonce_call(address):
+    """Transaction count/nonce."""
+    return ("eth_getTransactionCount", [address, "latest"])
+
+def rpc_ints(calls):
+    """Run calls as one batch and decode each hex result as an int."""
+    return [int(result["result"], 16) for result in rpc_batch(calls)]
+
+def get_weth_balance(address):
+    """Query WETH balance on Base."""
+    result = rpc_call(*weth_balance_call(address))
     return int(result["result"], 16)
 
-def get_nonce(address):
-    """Get transaction count/nonce."""
-    result = rpc_call("eth_getTransactionCount", [address, "latest"])
+def check_allowance(owner, spender):
+    """Check WETH allowance for CoW vault."""
+    result = rpc_call(*allowance_call(owner, spender))
     return int(result["result"], 16)
 
 def send_raw_tx(signed_tx_hex):
     """Send raw transaction."""
-    result = rpc_call("eth_sendRawTransaction", [signed_tx_hex])
+    # Not hedged: a duplicate send to a second endpoint could fail with
+    # "already known" after the first one accepted it
+    result = rpc_call("eth_sendRawTransaction", [signed_tx_hex], hedge=False)
     return result.get("result")
 
-def wait_for_tx(tx_hash, timeout=60):
-    """Wait for transaction to be mined."""
+def get_receipt(tx_hash):
+    """Transaction receipt, or None while it's pending (or on RPC errors)."""
+    try:
+        return rpc_call("eth_getTransactionReceipt", [tx_hash]).get("result")
+    except Exception:
+        return None
+
+def wait_for_tx_ws(tx_hash, deadline):
+    """Wait for a receipt by checking once per block pushed over WebSocket.
+    
+    Returns None (so the caller can poll instead) when websockets isn't
+    installed, the subscription fails, or the deadline passes.
+    """
+    try:
+        from websockets.sync.client import connect
+    except ImportError:
+        return None
+    
+    try:
+        with connect(WS_URL, open_timeout=5, close_timeout=1) as ws:
+            ws.send(json.dumps({
+                "jsonrpc": "2.0", "id": 1,
+                "method": "eth_subscribe", "params": ["newHeads"],
+            }))
+            if "result" not in json_loads(ws.recv(timeout=5)):
+                return None
+            # Subscribed before the first check, so no block can slip by
+            while True:
+                receipt = get_receipt(tx_hash)
+                if receipt:
+                    return receipt
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                try:
+                    ws.recv(timeout=min(remaining, WS_RECV_TIMEOUT))  # next block header
+                except TimeoutError:
+                    pass  # no block pushed in time; check the receipt regardless
+    except Exception:
+        return None
+
+def wait_for_tx(tx_hash, timeout=60, poll_interval=1):
+    """Wait for transaction to be mined (newHeads push, falling back to polling)."""
     start = time.time()
+    receipt = wait_for_tx_ws(tx_hash, start + timeout)
+    if receipt:
+        return receipt
     while time.time() - start < timeout:
-        try:
-            result = rpc_call("eth_getTransactionReceipt", [tx_hash])
-            if result.get("result"):
-                return result["result"]
-        except:
-            pass
-        time.sleep(2)
+        receipt = get_receipt(tx_hash)
+        if receipt:
+            return receipt
+        # Base produces a block every ~2s; 1s polling catches it within half a block
+        time.sleep(poll_interval)
+    # Last look, in case the WebSocket wait used up the whole timeout
+    receipt = get_receipt(tx_hash)
+    if receipt:
+        return receipt
     raise Exception("Transaction not mined within timeout")
 
 def get_quote(sell_amount_wei, from_address):
@@ -147,14 +379,16 @@ def get_quote(sell_amount_wei, from_address):
         headers={"Content-Type": "application/json"}
     )
     resp = urllib.request.urlopen(req, timeout=30)
-    return json.loads(resp.read())
+    return json_loads(resp.read())
 
 def cmd_quote():
     """Get a quote."""
     wallet = get_wallet()
-    balance = get_weth_balance(wallet.address)
-    eth_balance = get_eth_balance(wallet.address)
-    allowance = check_allowance(wallet.address, COW_VAULT)
+    balance, eth_balance, allowance = rpc_ints([
+        weth_balance_call(wallet.address),
+        eth_balance_call(wallet.address),
+        allowance_call(wallet.address, COW_VAULT),
+    ])
     
     print(f"Wallet: {wallet.address}")
     print(f"ETH Balance: {eth_balance/1e18:.6f} ETH")
@@ -181,18 +415,22 @@ def cmd_quote():
     
     if allowance >= balance:
         print("✅ Already approved! Ready to swap.")
-        print(f"   Run: python3 {sys.argv[0]} swap")
+        print(f"   Run: python3 {SCRIPT_NAME} swap")
     else:
         print("⚠️  Need approval first (one-time, costs ~0.0001 ETH)")
-        print(f"   Run: python3 {sys.argv[0]} approve")
+        print(f"   Run: python3 {SCRIPT_NAME} approve")
 
 def cmd_approve():
     """Approve WETH for CoW Protocol."""
     from eth_account import Account
     
     wallet = get_wallet()
-    eth_balance = get_eth_balance(wallet.address)
-    allowance = check_allowance(wallet.address, COW_VAULT)
+    eth_balance, allowance, gas_price, nonce = rpc_ints([
+        eth_balance_call(wallet.address),
+        allowance_call(wallet.address, COW_VAULT),
+        gas_price_call(),
+        nonce_call(wallet.address),
+    ])
     
     print(f"Wallet: {wallet.address}")
     print(f"ETH Balance: {eth_balance/1e18:.6f} ETH")
@@ -203,16 +441,9 @@ def cmd_approve():
         print("✅ Already approved!")
         return
     
-    # Build approval transaction
-    # approve(spender, amount) - max approval
-    data = f"0x095ea7b3000000000000000000000000{COW_VAULT[2:].lower()}{'f'*64}"
-    
-    gas_price = get_gas_price()
     # Add 20% buffer
     gas_price = int(gas_price * 1.2)
     
-    nonce = get_nonce(wallet.address)
-    
     # Estimate gas
     gas_estimate = 50000  # Standard ERC20 approve
     
@@ -232,7 +463,7 @@ def cmd_approve():
         "gas": gas_estimate,
         "maxFeePerGas": gas_price * 2,
         "maxPriorityFeePerGas": gas_price,
-        "data": bytes.fromhex(data[2:]),
+        "data": _APPROVE_MAX_CALLDATA,  # approve(COW_VAULT, max)
     }
     
     print("Signing and sending approval transaction...")
@@ -255,7 +486,7 @@ def cmd_approve():
         new_allowance = check_allowance(wallet.address, COW_VAULT)
         print(f"   New allowance: {new_allowance/1e18:.5f} WETH (max)")
         print()
-        print(f"Now run: python3 {sys.argv[0]} swap")
+        print(f"Now run: python3 {SCRIPT_NAME} swap")
     else:
         print(f"❌ Transaction failed!")
 
@@ -265,17 +496,22 @@ def cmd_swap(amount=None):
     from eth_account.messages import encode_typed_data
     
     wallet = get_wallet()
-    balance = get_weth_balance(wallet.address)
-    allowance = check_allowance(wallet.address, COW_VAULT)
-    
-    sell_wei = int(amount * 1e18) if amount else balance
+    if amount:
+        # The balance is only needed to default the amount
+        sell_wei = int(amount * 1e18)
+        allowance = check_allowance(wallet.address, COW_VAULT)
+    else:
+        sell_wei, allowance = rpc_ints([
+            weth_balance_call(wallet.address),
+            allowance_call(wallet.address, COW_VAULT),
+        ])
     
     print(f"Wallet: {wallet.address}")
     print(f"Swapping: {sell_wei/1e18:.5f} WETH → USDC")
     print()
     
     if allowance < sell_wei:
-        print(f"❌ Insufficient allowance. Run: python3 {sys.argv[0]} approve")
+        print(f"❌ Insufficient allowance. Run: python3 {SCRIPT_NAME} approve")
         return
     
     # Get fresh quote
@@ -380,7 +616,7 @@ def cmd_swap(amount=None):
     
     try:
         resp = urllib.request.urlopen(req, timeout=30)
-        order_uid = json.loads(resp.read())
+        order_uid = json_loads(resp.read())
         print(f"✅ Order submitted!")
         print(f"   Order ID: {order_uid}")
         print(f"   Track: https://explorer.cow.fi/base/orders/{order_uid}")
@@ -392,19 +628,20 @@ def cmd_swap(amount=None):
         print(f"❌ Order submission failed: {e.code}")
         print(f"   {error_body}")
 
-def main():
-    if len(sys.argv) < 2:
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 1:
         print(__doc__)
         sys.exit(1)
     
-    action = sys.argv[1].lower()
+    action = argv[0].lower()
     
     if action == "quote":
         cmd_quote()
     elif action == "approve":
         cmd_approve()
     elif action == "swap":
-        amount = float(sys.argv[2]) if len(sys.argv) > 2 else None
+        amount = float(argv[1]) if len(argv) > 1 else None
         cmd_swap(amount)
     else:
         print(f"Unknown action: {action}")
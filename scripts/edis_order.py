@@ -6,6 +6,7 @@ Orders VPS hosting and pays with crypto (Cryptomus → Polygon USDC).
 USAGE:
     python3 edis_order.py locations           # List available locations
     python3 edis_order.py products <loc_id>   # List products for location
+    python3 edis_order.py all-products        # Products for every in-stock location
     python3 edis_order.py payment-methods     # List payment methods
     python3 edis_order.py order               # Place order (interactive)
 
@@ -21,8 +22,17 @@ Created: 2026-02-08
 import os
 import sys
 import json
+import functools
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # optional; stdlib json is used when it's missing
+    orjson = None
 
 API_BASE = "https://order.edisglobal.com/kvm/v2"
 
@@ -35,6 +45,32 @@ DEFAULT_CONFIG = {
     "hostname": "noctiluca-vps",
 }
 
+# Concurrent product lookups in all-products (also the get/* pool size)
+PRODUCT_FETCH_WORKERS = 8
+
+_session = None
+
+def get_session():
+    """Shared keep-alive HTTP session for API calls (created on first use).
+    
+    Read-only get/* endpoints are retried on connection errors and 502/503/504;
+    add/order is never retried so a flaky gateway can't duplicate an order.
+    """
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        _session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+        retry = Retry(
+            total=2,
+            backoff_factor=0.3,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=["GET", "POST"],
+            raise_on_status=False,  # hand the last response to the caller
+        )
+        _session.mount(f"{API_BASE}/get/", HTTPAdapter(
+            pool_connections=2, pool_maxsize=PRODUCT_FETCH_WORKERS, max_retries=retry))
+    return _session
+
 def load_credentials():
     """Load EDIS credentials from file."""
     creds_file = Path.home() / ".noctiluca" / "private" / "edis.txt"
@@ -51,22 +87,33 @@ def load_credentials():
     email, password = content.split(":", 1)
     return email, password
 
-def api_request(endpoint, email, password, extra_data=None):
-    """Make API request to EDIS order API."""
+def format_json(data):
+    """Pretty-print data as 2-space indented JSON (orjson when available)."""
+    if orjson:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+        except TypeError:  # e.g. integers beyond 64 bits
+            pass
+    return json.dumps(data, indent=2)
+
+def api_request(endpoint, email, password, extra_data=None, quiet=False):
+    """Make API request to EDIS order API (quiet: don't print API errors)."""
     url = f"{API_BASE}/{endpoint}"
     data = {"email": email, "pw": password}
     if extra_data:
         data.update(extra_data)
     
-    response = requests.post(
+    response = get_session().post(
         url,
         data=data,
-        headers={"Content-Type": "application/x-www-form-urlencoded"}
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+        timeout=30,
     )
     
     if response.status_code != 200:
-        print(f"❌ API error: {response.status_code}")
-        print(response.text)
+        if not quiet:
+            print(f"❌ API error: {response.status_code}")
+            print(response.text)
         return None
     
     return response.json()
@@ -98,14 +145,15 @@ def get_payment_methods(email, password):
     
     return result["paymentmethods"]
 
+@functools.lru_cache(maxsize=1)
 def get_ssh_pubkey():
-    """Get SSH public key for the VPS."""
-    ssh_key_file = Path.home() / ".ssh" / "id_ed25519.pub"
-    if not ssh_key_file.exists():
-        ssh_key_file = Path.home() / ".ssh" / "id_rsa.pub"
-    
-    if ssh_key_file.exists():
-        return ssh_key_file.read_text().strip()
+    """Get SSH public key for the VPS (read once per run)."""
+    ssh_dir = os.path.join(os.path.expanduser("~"), ".ssh")
+    for name in ("id_ed25519.pub", "id_rsa.pub"):
+        ssh_key_file = os.path.join(ssh_dir, name)
+        if os.path.isfile(ssh_key_file):
+            with open(ssh_key_file) as f:
+                return f.read().strip()
     
     return None
 
@@ -131,11 +179,12 @@ def place_order(email, password, product_id, os_id, hostname, ssh_pubkey=None):
     
     # The order API expects JSON in the body
     url = f"{API_BASE}/add/order"
-    response = requests.post(
+    response = get_session().post(
         url,
         data={"email": email, "pw": password},
         json=order_data,
-        headers={"Content-Type": "application/json"}
+        headers={"Content-Type": "application/json"},
+        timeout=30,
     )
     
     if response.status_code != 200:
@@ -186,7 +235,29 @@ def cmd_products(location_id):
     
     print(f"\n📦 VPS Products for Location {location_id}:")
     print("-" * 70)
-    print(json.dumps(products, indent=2))
+    print(format_json(products))
+
+def cmd_all_products():
+    """List products for every in-stock location (fetched concurrently)."""
+    email, password = load_credentials()
+    locations = get_locations(email, password)
+    
+    if not locations:
+        return
+    
+    available = [info for _, info in sorted(locations.items())
+                 if not info.get("out_of_stock")]
+    with ThreadPoolExecutor(max_workers=PRODUCT_FETCH_WORKERS) as executor:
+        results = executor.map(
+            lambda info: get_products(email, password, info["id"]), available)
+        products_by_location = list(zip(available, results))
+    
+    for info, products in products_by_location:
+        if not products:
+            continue
+        print(f"\n📦 VPS Products for {info['name']} (ID: {info['id']}):")
+        print("-" * 70)
+        print(format_json(products))
 
 def cmd_payment_methods():
     """List payment methods."""
@@ -210,43 +281,73 @@ def cmd_order():
     print("\n🛒 EDIS Global VPS Order")
     print("=" * 50)
     
-    # Get SSH key
-    ssh_pubkey = get_ssh_pubkey()
-    if ssh_pubkey:
-        print(f"✅ SSH key found: {ssh_pubkey[:50]}...")
-    else:
-        print("⚠️ No SSH key found - you'll need to set one manually")
+    # Fetch the read-only order data concurrently while reading the SSH key;
+    # the workers don't print, so failures are reported below in order
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        products_future = executor.submit(
+            api_request, "get/products", email, password,
+            {"location": DEFAULT_CONFIG["location_id"]}, quiet=True)
+        locations_future = executor.submit(
+            api_request, "get/locations", email, password, quiet=True)
+        methods_future = executor.submit(
+            api_request, "get/paymentmethods", email, password, quiet=True)
+        
+        # Get SSH key
+        ssh_pubkey = get_ssh_pubkey()
+        if ssh_pubkey:
+            print(f"✅ SSH key found: {ssh_pubkey[:50]}...")
+        else:
+            print("⚠️ No SSH key found - you'll need to set one manually")
     
-    # Get products for default location
+    products = products_future.result()
+    locations = (locations_future.result() or {}).get("locations")
+    methods = (methods_future.result() or {}).get("paymentmethods")
+    
+    # Get products for default location; locations and payment methods only
+    # feed the warnings below
     print(f"\n📍 Location: {DEFAULT_CONFIG['location_name']}")
-    products = get_products(email, password, DEFAULT_CONFIG["location_id"])
+    if locations is None:
+        print("⚠️ Could not get locations - stock not checked")
+    else:
+        location = next((info for info in locations.values()
+                         if info.get("id") == DEFAULT_CONFIG["location_id"]), None)
+        if location and location.get("out_of_stock"):
+            print("⚠️ Default location is out of stock - run 'locations' for alternatives")
+    if methods is None:
+        print("⚠️ Could not get payment methods - "
+              f"{DEFAULT_CONFIG['paymentmethod']} not checked")
+    elif DEFAULT_CONFIG["paymentmethod"] not in methods:
+        print(f"⚠️ Payment method {DEFAULT_CONFIG['paymentmethod']} is not offered")
     
     if not products:
         print("❌ Could not fetch products")
         return
     
     print("\n📦 Available products:")
-    print(json.dumps(products, indent=2))
+    print(format_json(products))
     
     # TODO: Parse products, let user select, place order
     print("\n⚠️ Order placement requires product ID and OS ID")
     print("Run 'products <location_id>' to see available options")
 
-def main():
-    if len(sys.argv) < 2:
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 1:
         print(__doc__)
         return
     
-    cmd = sys.argv[1].lower()
+    cmd = argv[0].lower()
     
     if cmd == "locations":
         cmd_locations()
     elif cmd == "products":
-        if len(sys.argv) < 3:
+        if len(argv) < 2:
             print("Usage: edis_order.py products <location_id>")
             print(f"Default: {DEFAULT_CONFIG['location_id']} ({DEFAULT_CONFIG['location_name']})")
             return
-        cmd_products(int(sys.argv[2]))
+        cmd_products(int(argv[1]))
+    elif cmd == "all-products":
+        cmd_all_products()
     elif cmd == "payment-methods":
         cmd_payment_methods()
     elif cmd == "order":
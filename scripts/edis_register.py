@@ -6,6 +6,8 @@ Opens browser with pre-filled registration form - just solve CAPTCHA and submit.
 USAGE:
     python3 edis_register.py              # Opens browser with form pre-filled
     python3 edis_register.py --headless   # Pre-fill check only (no browser visible)
+    python3 edis_register.py --force      # Overwrite existing credentials without asking
+    python3 edis_register.py --debug      # Slow down browser actions (100ms each)
 
 AFTER REGISTRATION:
     1. Copy your credentials to ~/.noctiluca/private/edis.txt
@@ -18,15 +20,16 @@ Author: Noctiluca
 Created: 2026-02-08
 """
 
+import argparse
+import asyncio
 import os
 import sys
-import time
 import secrets
 import string
 from pathlib import Path
 
 try:
-    from playwright.sync_api import sync_playwright
+    from playwright.async_api import async_playwright
 except ImportError:
     print("❌ Playwright not installed")
     print("Run: pip3 install playwright && playwright install chromium")
@@ -50,10 +53,81 @@ REGISTRATION_DATA = {
 
 REGISTRATION_URL = "https://manage.edisglobal.com/register.php"
 
+# Form text inputs by REGISTRATION_DATA key; the country dropdown, state and
+# password fields are handled separately around the country selection
+FIELD_SELECTORS = {
+    "firstname": "#inputFirstName",
+    "lastname": "#inputLastName",
+    "email": "#inputEmail",
+    "phonenumber": "#inputPhone",
+    "companyname": "#inputCompanyName",
+    "address1": "#inputAddress1",
+    "address2": "#inputAddress2",
+    "city": "#inputCity",
+    "postcode": "#inputPostcode",
+}
+COUNTRY_SELECTOR = "#inputCountry"
+
+# Delay (ms) before each browser action with --debug, to follow the fill
+DEBUG_SLOW_MO = 100
+
+# Only one form page is loaded, so skip Chromium's background services
+CHROMIUM_ARGS = [
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--disable-translate",
+    "--no-first-run",
+    "--no-default-browser-check",
+]
+
+# Images aren't needed to fill the form; only blocked headless, since the
+# reCAPTCHA solved in a visible browser needs them
+IMAGE_ROUTE = "**/*.{png,jpg,jpeg,gif,webp,svg}"
+
+STATE_READY_JS = """() => {
+    const s = document.querySelector('#state');
+    return s && !s.disabled && (s.tagName === 'INPUT' || s.options.length > 1);
+}"""
+
+# Sets every {selector: value} field in one round trip, firing the input/change
+# events page.fill() would; missing or hidden fields are skipped and their
+# selectors returned
+FILL_FIELDS_JS = """(fields) => {
+    const skipped = [];
+    for (const [sel, val] of Object.entries(fields)) {
+        const el = document.querySelector(sel);
+        if (!el || el.offsetParent === null) {
+            skipped.push(sel);
+            continue;
+        }
+        el.value = val;
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+    }
+    return skipped;
+}"""
+
+# The only field allowed to be missing (some countries have no state)
+OPTIONAL_SELECTORS = {"#state"}
+
+_CHARS = tuple(string.ascii_letters + string.digits + "!@#$%^&*")
+_CHARS_LEN = len(_CHARS)
+# Largest multiple of len(_CHARS) below 256; bytes at or above it are
+# rejected so every character stays equally likely
+_BYTE_LIMIT = 256 - 256 % _CHARS_LEN
+
 def generate_password(length=20):
     """Generate a secure random password."""
-    chars = string.ascii_letters + string.digits + "!@#$%^&*"
-    return ''.join(secrets.choice(chars) for _ in range(length))
+    chars = []
+    while len(chars) < length:
+        # One CSPRNG read per round; ~18% of bytes are rejected, so 2x
+        # covers the length almost always
+        chars.extend(_CHARS[b % _CHARS_LEN]
+                     for b in secrets.token_bytes(length * 2) if b < _BYTE_LIMIT)
+    return ''.join(chars[:length])
 
 def save_credentials(email, password):
     """Save credentials to file."""
@@ -68,115 +142,170 @@ def save_credentials(email, password):
     print(f"\n✅ Credentials saved to {creds_file}")
     return creds_file
 
-def prefill_registration(headless=False):
-    """Open browser and pre-fill registration form."""
-    password = generate_password()
+async def open_browser(headless=False, debug=False):
+    """Start Playwright and launch Chromium once; returns (playwright, browser).
     
-    print("\n🔐 Generated password:", password)
-    print("📧 Email:", REGISTRATION_DATA["email"])
-    print("\n⏳ Opening registration page...")
-    
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=headless,
-            slow_mo=100  # Slow down for visibility
-        )
-        ctx = browser.new_context(
-            viewport={'width': 1280, 'height': 900},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
-        )
-        page = ctx.new_page()
+    The browser can serve many registrations (one context each); call
+    close_browser() when done. debug slows every action down for watching.
+    """
+    playwright = await async_playwright().start()
+    browser = await playwright.chromium.launch(
+        headless=headless,
+        slow_mo=DEBUG_SLOW_MO if debug else 0,
+        args=CHROMIUM_ARGS,
+    )
+    return playwright, browser
+
+async def close_browser(playwright, browser):
+    """Close the browser and stop Playwright."""
+    await browser.close()
+    await playwright.stop()
+
+async def _abort_route(route):
+    await route.abort()
+
+async def _fill_fields(page, fields):
+    """Fill {selector: value} fields via FILL_FIELDS_JS; raise if a required one is missing."""
+    skipped = await page.evaluate(FILL_FIELDS_JS, fields)
+    missing = [sel for sel in skipped if sel not in OPTIONAL_SELECTORS]
+    if missing:
+        raise RuntimeError(f"Form fields not found or hidden: {', '.join(missing)}")
+
+async def fill_one(browser, data, password, block_images=False):
+    """Open a fresh context on browser and pre-fill the form; returns (ctx, page)."""
+    ctx = await browser.new_context(
+        viewport={'width': 1280, 'height': 900},
+        user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
+    )
+    try:
+        if block_images:
+            await ctx.route(IMAGE_ROUTE, _abort_route)
+        page = await ctx.new_page()
         
         # Go to registration page
-        page.goto(REGISTRATION_URL, timeout=60000)
-        page.wait_for_load_state('domcontentloaded')
+        await page.goto(REGISTRATION_URL, timeout=60000)
+        await page.wait_for_load_state('domcontentloaded')
         
         print("📝 Filling form fields...")
         
-        # Fill personal info
-        page.fill('#inputFirstName', REGISTRATION_DATA["firstname"])
-        page.fill('#inputLastName', REGISTRATION_DATA["lastname"])
-        page.fill('#inputEmail', REGISTRATION_DATA["email"])
-        page.fill('#inputPhone', REGISTRATION_DATA["phonenumber"])
-        
-        if REGISTRATION_DATA["companyname"]:
-            page.fill('#inputCompanyName', REGISTRATION_DATA["companyname"])
-        
-        # Fill address
-        page.fill('#inputAddress1', REGISTRATION_DATA["address1"])
-        if REGISTRATION_DATA["address2"]:
-            page.fill('#inputAddress2', REGISTRATION_DATA["address2"])
-        page.fill('#inputCity', REGISTRATION_DATA["city"])
-        page.fill('#inputPostcode', REGISTRATION_DATA["postcode"])
-        
-        # Select country FIRST (Germany = DE, triggers state dropdown update)
-        page.select_option('#inputCountry', REGISTRATION_DATA["country"])
-        time.sleep(1)  # Wait for state dropdown to update based on country
-        
-        # State field - only fill if visible (some countries don't have states)
-        state_input = page.query_selector('#state')
-        if state_input and state_input.is_visible():
-            state_input.fill(REGISTRATION_DATA["state"])
-        
-        # Fill passwords
-        page.fill('#inputNewPassword1', password)
-        page.fill('#inputNewPassword2', password)
-        
-        print("\n✅ Form pre-filled!")
-        print("=" * 50)
-        print("🔐 PASSWORD:", password)
-        print("📧 EMAIL:", REGISTRATION_DATA["email"])
-        print("=" * 50)
-        
-        if headless:
-            # Just verify and exit
-            print("\n✅ Form validation passed (headless mode)")
-            page.screenshot(path='/tmp/edis_register_filled.png')
-            print("📸 Screenshot saved: /tmp/edis_register_filled.png")
-            browser.close()
-            return
-        
-        # Save credentials now (before submission)
-        creds_file = save_credentials(REGISTRATION_DATA["email"], password)
-        
-        print("\n" + "=" * 50)
-        print("🤖 NEXT STEPS:")
-        print("1. Solve the reCAPTCHA in the browser")
-        print("2. Check 'I agree to terms' checkbox")
-        print("3. Click 'Register'")
-        print("4. Check your email for verification")
-        print("=" * 50)
-        print("\n⏳ Waiting for you to complete registration...")
-        print("   (Browser will close after 5 minutes or when you close it)")
+        # Fill personal info and address in a single evaluate (empty optional
+        # fields like company name are left alone)
+        fields = {selector: data[key] for key, selector in FIELD_SELECTORS.items()
+                  if data[key]}
+        await _fill_fields(page, fields)
         
+        # Select country FIRST (Germany = DE, triggers state dropdown update);
+        # a real select_option so the site's change handler runs
+        await page.locator(COUNTRY_SELECTOR).select_option(data["country"])
+        # Wait until the site has swapped in the state field for the new country:
+        # a text input, or a dropdown once its AJAX option list has arrived
         try:
-            # Wait for navigation away from register page (successful registration)
-            page.wait_for_url("**/clientarea.php**", timeout=300000)
-            print("\n🎉 Registration successful!")
-        except:
-            print("\n⚠️ Timeout or browser closed")
+            await page.wait_for_function(STATE_READY_JS, timeout=5000)
+        except Exception:
+            pass  # some countries have no state field
         
-        browser.close()
+        # State (skipped when hidden - some countries don't have states) and
+        # passwords in a second evaluate
+        await _fill_fields(page, {
+            '#state': data["state"],
+            '#inputNewPassword1': password,
+            '#inputNewPassword2': password,
+        })
+    except BaseException:
+        # Don't leak the context (and its page) when a step fails
+        await ctx.close()
+        raise
+    
+    return ctx, page
+
+async def prefill_registration(headless=False, browser=None, debug=False):
+    """Open browser and pre-fill registration form.
+    
+    Pass a browser from open_browser() to reuse it across registrations;
+    otherwise one is launched and closed for this registration.
+    """
+    password = generate_password()
+    
+    print("\n🔐 Generated password:", password)
+    print("📧 Email:", REGISTRATION_DATA["email"])
+    print("\n⏳ Opening registration page...")
+    
+    owned = browser is None
+    if owned:
+        playwright, browser = await open_browser(headless=headless, debug=debug)
+    
+    try:
+        ctx, page = await fill_one(browser, REGISTRATION_DATA, password,
+                                   block_images=headless)
+        try:
+            print("\n✅ Form pre-filled!")
+            print("=" * 50)
+            print("🔐 PASSWORD:", password)
+            print("📧 EMAIL:", REGISTRATION_DATA["email"])
+            print("=" * 50)
+            
+            if headless:
+                # Just verify and exit
+                print("\n✅ Form validation passed (headless mode)")
+                await page.screenshot(path='/tmp/edis_register_filled.png')
+                print("📸 Screenshot saved: /tmp/edis_register_filled.png")
+                return
+            
+            # Save credentials now (before submission)
+            creds_file = save_credentials(REGISTRATION_DATA["email"], password)
+            
+            print("\n" + "=" * 50)
+            print("🤖 NEXT STEPS:")
+            print("1. Solve the reCAPTCHA in the browser")
+            print("2. Check 'I agree to terms' checkbox")
+            print("3. Click 'Register'")
+            print("4. Check your email for verification")
+            print("=" * 50)
+            print("\n⏳ Waiting for you to complete registration...")
+            print("   (Browser will close after 5 minutes or when you close it)")
+            
+            try:
+                # Wait for navigation away from register page (successful registration)
+                await page.wait_for_url("**/clientarea.php**", timeout=300000)
+                print("\n🎉 Registration successful!")
+            except:
+                print("\n⚠️ Timeout or browser closed")
+        finally:
+            await ctx.close()
+    finally:
+        if owned:
+            await close_browser(playwright, browser)
     
     print("\n✅ Done! Credentials saved at:", creds_file)
     print("Run: python3 edis_order.py locations")
 
-def main():
-    headless = "--headless" in sys.argv
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-fill the EDIS Global registration form")
+    parser.add_argument("--headless", action="store_true",
+                        help="Pre-fill check only (no browser visible)")
+    parser.add_argument("--force", action="store_true",
+                        help="Overwrite existing credentials without asking")
+    parser.add_argument("--debug", action="store_true",
+                        help="Slow down browser actions to watch the form fill")
+    args = parser.parse_args(argv)
     
     print("\n🌊 EDIS Global Account Registration Helper")
     print("=" * 50)
     
     # Check if already registered
     creds_file = Path.home() / ".noctiluca" / "private" / "edis.txt"
-    if creds_file.exists():
+    if creds_file.exists() and not args.force:
         print(f"⚠️ Credentials already exist at {creds_file}")
+        if not sys.stdin.isatty():
+            # Nobody can answer the prompt (cron/CI); don't block on it
+            print("Refusing to overwrite without --force")
+            sys.exit(2)
         response = input("Overwrite? (y/N): ").strip().lower()
         if response != 'y':
             print("Aborted.")
             return
     
-    prefill_registration(headless=headless)
+    asyncio.run(prefill_registration(headless=args.headless, debug=args.debug))
 
 if __name__ == "__main__":
     main()
@@ -5,11 +5,12 @@ Sets up a fresh VPS with essential tools and security hardening.
 
 USAGE:
     python3 provision_vps.py <host> [--user root] [--key ~/.ssh/id_rsa]
+    python3 provision_vps.py provision <host> <host> ...  # Several VPS concurrently
     python3 provision_vps.py setup-keys <host>   # Copy SSH key to VPS
-    python3 provision_vps.py check <host>        # Check VPS status
+    python3 provision_vps.py check <host> ...    # Check VPS status
 
 WHAT IT DOES:
-    1. Updates system packages
+    1. Refreshes package lists (full upgrade with --full-upgrade)
     2. Installs essential tools (git, curl, wget, htop, tmux, fail2ban)
     3. Creates 'noctiluca' user with sudo access
     4. Configures SSH hardening (disable root login, password auth)
@@ -24,49 +25,99 @@ Created: 2026-02-08
 import os
 import sys
 import argparse
+import functools
+import selectors
 import subprocess
 from pathlib import Path
 
-# Commands to run on fresh VPS
-PROVISION_COMMANDS = """
+ACTIONS = ("provision", "check", "setup-keys")
+
+# Per-host session logs (see run_ssh_hosts)
+LOG_DIR = Path.home() / ".noctiluca" / "logs"
+
+# Share one SSH connection per host across sessions (setup-keys, check,
+# provision); the master lingers 60s after the last session. %C is a hash of
+# the connection, keeping the socket path short
+SSH_MUX_OPTIONS = [
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPath=~/.ssh/cm-%C",
+    "-o", "ControlPersist=60s",
+]
+
+# Provisioning defaults: the sudo user to create, Node.js major version and
+# the apt packages installed in the single install transaction
+DEFAULT_USER = "noctiluca"
+NODE_MAJOR = 22
+DEFAULT_PACKAGES = (
+    "ca-certificates",
+    "git", "curl", "wget", "htop", "tmux", "vim",
+    "fail2ban", "ufw",
+    "python3", "python3-pip", "python3-venv",
+    "build-essential",
+)
+
+# Commands to run on fresh VPS; rendered by build_provision_script(), so
+# literal braces are doubled
+PROVISION_TEMPLATE = """
 set -e
 
+export DEBIAN_FRONTEND=noninteractive
+# DEBIAN_FRONTEND only silences debconf; these settle dpkg's own conffile
+# prompts (default answer if there is one, otherwise keep the local file)
+DPKG_CONF="-o Dpkg::Options::=--force-confdef -o Dpkg::Options::=--force-confold"
+
 echo "=== 1. System Update ==="
-apt-get update -y
-DEBIAN_FRONTEND=noninteractive apt-get upgrade -y
+# Add the NodeSource repository up front so nodejs joins the single install
+# below (the NodeSource setup script would run its own apt-get update)
+NODE_MAJOR={node_major}
+NODE_PKG=""
+if ! command -v node &> /dev/null; then
+    if ! command -v curl &> /dev/null || ! command -v gpg &> /dev/null; then
+        apt-get update -y </dev/null
+        apt-get install -y --no-install-recommends ca-certificates curl gnupg </dev/null
+    fi
+    mkdir -p /etc/apt/keyrings
+    curl -fsSL https://deb.nodesource.com/gpgkey/nodesource-repo.gpg.key \
+        | gpg --dearmor --yes -o /etc/apt/keyrings/nodesource.gpg
+    echo "deb [signed-by=/etc/apt/keyrings/nodesource.gpg] https://deb.nodesource.com/node_$NODE_MAJOR.x nodistro main" \
+        > /etc/apt/sources.list.d/nodesource.list
+    NODE_PKG=nodejs
+fi
+apt-get update -y </dev/null
+# Fresh images are recent enough; a full upgrade only runs on request
+if [ "${{FULL_UPGRADE:-0}}" = 1 ]; then
+    apt-get upgrade -y $DPKG_CONF </dev/null
+fi
 
 echo "=== 2. Essential Packages ==="
-apt-get install -y \
-    git curl wget htop tmux vim \
-    fail2ban ufw \
-    python3 python3-pip python3-venv \
-    build-essential
+# One dpkg transaction; ca-certificates is listed because curl only
+# recommends it
+apt-get install -y --no-install-recommends $DPKG_CONF {packages} $NODE_PKG </dev/null
 
-echo "=== 3. Node.js LTS (v22) ==="
-if ! command -v node &> /dev/null; then
-    curl -fsSL https://deb.nodesource.com/setup_22.x | bash -
-    apt-get install -y nodejs
-fi
+echo "=== 3. Node.js LTS (v$NODE_MAJOR) ==="
 echo "Node version: $(node --version)"
 echo "npm version: $(npm --version)"
 
-echo "=== 4. Create User 'noctiluca' ==="
-if ! id "noctiluca" &>/dev/null; then
-    useradd -m -s /bin/bash -G sudo noctiluca
-    echo "noctiluca ALL=(ALL) NOPASSWD:ALL" > /etc/sudoers.d/noctiluca
-    chmod 440 /etc/sudoers.d/noctiluca
-    mkdir -p /home/noctiluca/.ssh
-    chmod 700 /home/noctiluca/.ssh
-    chown -R noctiluca:noctiluca /home/noctiluca/.ssh
-    echo "Created user 'noctiluca' with sudo access"
+echo "=== 4. Create User '{user}' ==="
+if ! id "{user}" &>/dev/null; then
+    useradd -m -s /bin/bash -G sudo {user}
+    echo "{user} ALL=(ALL) NOPASSWD:ALL" > /etc/sudoers.d/{user}
+    chmod 440 /etc/sudoers.d/{user}
+    mkdir -p /home/{user}/.ssh
+    chmod 700 /home/{user}/.ssh
+    chown -R {user}:{user} /home/{user}/.ssh
+    echo "Created user '{user}' with sudo access"
 else
-    echo "User 'noctiluca' already exists"
+    echo "User '{user}' already exists"
 fi
 
 echo "=== 5. SSH Hardening ==="
-sed -i 's/^#*PermitRootLogin.*/PermitRootLogin no/' /etc/ssh/sshd_config
-sed -i 's/^#*PasswordAuthentication.*/PasswordAuthentication no/' /etc/ssh/sshd_config
-sed -i 's/^#*PubkeyAuthentication.*/PubkeyAuthentication yes/' /etc/ssh/sshd_config
+# One in-place pass over sshd_config for all three settings
+sed -i \
+    -e 's/^#*PermitRootLogin.*/PermitRootLogin no/' \
+    -e 's/^#*PasswordAuthentication.*/PasswordAuthentication no/' \
+    -e 's/^#*PubkeyAuthentication.*/PubkeyAuthentication yes/' \
+    /etc/ssh/sshd_config
 systemctl restart sshd
 
 echo "=== 6. Firewall (UFW) ==="
@@ -85,10 +136,22 @@ echo "Host: $(hostname)"
 echo "IP: $(curl -s ifconfig.me)"
 echo "Uptime: $(uptime)"
 echo ""
-echo "⚠️  Root login disabled. Use 'noctiluca' user with SSH key."
-echo "⚠️  Copy your SSH key: ssh-copy-id noctiluca@<host>"
+echo "⚠️  Root login disabled. Use '{user}' user with SSH key."
+echo "⚠️  Copy your SSH key: ssh-copy-id {user}@<host>"
 """
 
+
+@functools.lru_cache(maxsize=32)
+def build_provision_script(user: str = DEFAULT_USER, node_major: int = NODE_MAJOR,
+                           packages: tuple = DEFAULT_PACKAGES) -> str:
+    """Render PROVISION_TEMPLATE (cached per distinct user/node/package set)."""
+    return PROVISION_TEMPLATE.format(user=user, node_major=node_major,
+                                     packages=" ".join(packages))
+
+
+# The default provisioning script
+PROVISION_COMMANDS = build_provision_script()
+
 # Quick status check
 CHECK_COMMANDS = """
 echo "=== VPS Status ==="
@@ -111,24 +174,129 @@ ss -tuln | grep LISTEN | awk '{print $5}' | sort -u
 """
 
 
-def run_ssh(host: str, commands: str, user: str = "root", key: str = None):
-    """Run commands over SSH."""
+def as_function_script(commands: str) -> str:
+    """Wrap commands in a shell function that is called on the last line.
+    
+    A script piped to 'bash -s' is read as it runs, so a command that reads
+    stdin (a dpkg prompt, a maintainer script) would swallow the lines after
+    it. Wrapped, bash has parsed the whole script before any of it runs.
+    """
+    return f"main() {{\n{commands}\n}}\nmain\n"
+
+
+def ssh_args_for(host: str, user: str = "root", key: str = None):
+    """Base ssh command line for user@host (multiplexed)."""
     ssh_args = ["ssh", "-o", "StrictHostKeyChecking=no", "-o", "ConnectTimeout=10"]
+    ssh_args.extend(SSH_MUX_OPTIONS)
     
     if key:
         ssh_args.extend(["-i", key])
     
     ssh_args.append(f"{user}@{host}")
-    ssh_args.append(commands)
+    return ssh_args
+
+
+def _ensure_masters(hosts, user: str = "root", key: str = None):
+    """Make sure a master connection to each host is up; returns {host: ok}.
     
-    print(f"🔌 Connecting to {user}@{host}...")
-    result = subprocess.run(ssh_args, capture_output=False)
-    return result.returncode == 0
+    Missing masters are opened one at a time by no-op sessions, so password
+    or host-key prompts never compete for the terminal. This happens without
+    pipes: a master forked from a piped session would hold its stdout open
+    for ControlPersist.
+    """
+    connected = {}
+    for host in hosts:
+        ssh_args = ssh_args_for(host, user, key)
+        check = subprocess.run(ssh_args[:1] + ["-O", "check"] + ssh_args[1:],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        connected[host] = (check.returncode == 0
+                           or subprocess.run(ssh_args + ["true"]).returncode == 0)
+    return connected
+
+
+def host_log_path(host: str):
+    """Where a host's session output is saved (overwritten each run)."""
+    return LOG_DIR / f"{host}.log"
+
+
+def run_ssh_hosts(hosts, commands: str, user: str = "root", key: str = None):
+    """Run commands on every host concurrently; returns {host: success}.
+    
+    All ssh sessions are multiplexed in one selector loop. Output is printed
+    as [host]-prefixed lines and saved to ~/.noctiluca/logs/<host>.log.
+    """
+    for host in hosts:
+        print(f"🔌 Connecting to {user}@{host}...")
+    connected = _ensure_masters(hosts, user, key)
+    results = {}
+    for host, ok in connected.items():
+        if not ok:
+            print(f"❌ Could not connect to {user}@{host}")
+            results[host] = False
+    
+    script = as_function_script(commands).encode()
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    sel = selectors.DefaultSelector()
+    procs = {}
+    for host in hosts:
+        if not connected[host]:
+            continue
+        # The script goes to a remote 'bash -s' over stdin rather than as
+        # one huge argv entry
+        ssh_args = ssh_args_for(host, user, key) + ["bash", "-s"]
+        proc = subprocess.Popen(ssh_args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, bufsize=0)
+        try:
+            proc.stdin.write(script)
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass  # ssh exited early; its output and exit code say why
+        os.set_blocking(proc.stdout.fileno(), False)
+        log = open(host_log_path(host), "wb")
+        sel.register(proc.stdout, selectors.EVENT_READ, [host, log, b""])
+        procs[host] = proc
+    
+    while sel.get_map():
+        for selkey, _ in sel.select(1.0):
+            state = selkey.data
+            host, log, partial = state
+            chunk = os.read(selkey.fd, 65536)
+            if not chunk:
+                # EOF: flush an unterminated last line
+                lines, state[2] = [partial] if partial else [], b""
+                sel.unregister(selkey.fileobj)
+                selkey.fileobj.close()
+                log.close()
+            else:
+                log.write(chunk)
+                *lines, state[2] = (partial + chunk).split(b"\n")
+            for line in lines:
+                print(f"[{host}] {line.decode(errors='replace')}")
+    sel.close()
+    
+    for host, proc in procs.items():
+        results[host] = proc.wait() == 0
+    return {host: results[host] for host in hosts}
+
+
+def run_ssh(host: str, commands: str, user: str = "root", key: str = None):
+    """Run commands over SSH, streaming output as [host]-prefixed lines."""
+    return run_ssh_hosts([host], commands, user, key)[host]
+
+
+def report_failures(results):
+    """Print failed hosts (for multi-host runs); returns True if all succeeded."""
+    failed = [host for host, success in results.items() if not success]
+    if failed and len(results) > 1:
+        print(f"❌ Failed on {len(failed)}/{len(results)} hosts: {', '.join(failed)}")
+    return not failed
 
 
 def setup_keys(host: str, user: str = "root", key: str = None):
     """Copy SSH public key to VPS."""
-    ssh_copy_args = ["ssh-copy-id", "-o", "StrictHostKeyChecking=no"]
+    # With the mux options the (password) session ssh-copy-id opens becomes
+    # the master that a following check/provision reuses
+    ssh_copy_args = ["ssh-copy-id", "-o", "StrictHostKeyChecking=no"] + SSH_MUX_OPTIONS
     
     if key:
         # Use the .pub version for ssh-copy-id
@@ -149,44 +317,63 @@ def setup_keys(host: str, user: str = "root", key: str = None):
     return result.returncode == 0
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Provision a VPS with essential tools")
-    parser.add_argument("action", choices=["provision", "check", "setup-keys"], 
-                       nargs="?", default="provision",
-                       help="Action to perform")
-    parser.add_argument("host", help="VPS hostname or IP address")
+    parser.add_argument("action", nargs="?", default="provision",
+                       help="Action to perform: provision (default), check or setup-keys")
+    parser.add_argument("hosts", nargs="*", metavar="host",
+                       help="VPS hostname or IP address (several run concurrently)")
     parser.add_argument("--user", "-u", default="root", help="SSH user (default: root)")
     parser.add_argument("--key", "-i", help="Path to SSH private key")
+    parser.add_argument("--full-upgrade", action="store_true",
+                       help="Also upgrade all installed packages (provision only)")
+    
+    args = parser.parse_args(argv)
     
-    args = parser.parse_args()
+    # The action may only be left out for a single host ("<host>"); with
+    # more positionals the first must be an action, so a typo like
+    # "chekc <host>" can't be mistaken for a host and provision it
+    if args.action not in ACTIONS:
+        if args.hosts:
+            parser.error(f"unknown action: {args.action} "
+                         f"(choose from {', '.join(ACTIONS)})")
+        args.hosts = [args.action]
+        args.action = "provision"
+    if not args.hosts:
+        parser.error("at least one host is required")
     
     if args.action == "setup-keys":
-        success = setup_keys(args.host, args.user, args.key)
-        sys.exit(0 if success else 1)
+        # One at a time: ssh-copy-id may prompt for each host's password
+        results = {host: setup_keys(host, args.user, args.key) for host in args.hosts}
+        sys.exit(0 if report_failures(results) else 1)
     
     if args.action == "check":
         print("🔍 Checking VPS status...")
-        success = run_ssh(args.host, CHECK_COMMANDS, args.user, args.key)
-        sys.exit(0 if success else 1)
+        results = run_ssh_hosts(args.hosts, CHECK_COMMANDS, args.user, args.key)
+        sys.exit(0 if report_failures(results) else 1)
     
     # Default: provision
     print("🚀 Starting VPS provisioning...")
     print("   This will install packages, harden SSH, and configure firewall.")
     print("")
     
-    success = run_ssh(args.host, PROVISION_COMMANDS, args.user, args.key)
+    commands = PROVISION_COMMANDS
+    if args.full_upgrade:
+        commands = "FULL_UPGRADE=1\n" + commands
+    results = run_ssh_hosts(args.hosts, commands, args.user, args.key)
     
-    if success:
+    if report_failures(results):
+        host = args.hosts[0] if len(args.hosts) == 1 else "<host>"
         print("")
         print("=" * 60)
         print("✅ VPS provisioned successfully!")
         print("")
         print("Next steps:")
         print("  1. Copy your SSH key to noctiluca user:")
-        print(f"     ssh-copy-id noctiluca@{args.host}")
+        print(f"     ssh-copy-id noctiluca@{host}")
         print("")
         print("  2. Connect as noctiluca:")
-        print(f"     ssh noctiluca@{args.host}")
+        print(f"     ssh noctiluca@{host}")
         print("")
         print("  3. (Optional) Install OpenClaw:")
         print("     npm install -g openclaw")
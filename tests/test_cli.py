@@ -13,6 +13,9 @@ spec = importlib.util.spec_from_file_location("noctiluca_tools", CLI_PATH)
 cli = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(cli)
 
+sys.path.insert(0, str(Path(__file__).parent))
+from local_rpc import LocalRPC
+
 
 class TestCliModuleFunctions(unittest.TestCase):
     """Tests for CLI module helper functions."""
@@ -32,6 +35,30 @@ class TestCliModuleFunctions(unittest.TestCase):
         # Note: result may be None or actual address depending on file existence
         self.assertTrue(result is None or result.startswith('0x'))
     
+    def test_get_wallet_address_reads_file(self):
+        """Should parse the Address line and notice when the file changes."""
+        import tempfile
+        import os
+        original_home = os.environ.get('HOME')
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                os.environ['HOME'] = tmpdir
+                cli._read_wallet_address.cache_clear()
+                wallet_dir = Path(tmpdir) / ".noctiluca" / "private"
+                wallet_dir.mkdir(parents=True)
+                wallet_file = wallet_dir / "evm_wallet.txt"
+                
+                wallet_file.write_text("Address: 0x" + "1" * 40 + "\nPrivate Key: 0xabc\n")
+                self.assertEqual(cli.get_wallet_address(), "0x" + "1" * 40)
+                self.assertEqual(cli.get_wallet_address(), "0x" + "1" * 40)
+                self.assertEqual(cli._read_wallet_address.cache_info().hits, 1)
+                
+                wallet_file.write_text("Private Key: 0xabcdef\nAddress: 0x" + "22" * 20 + "\n")
+                self.assertEqual(cli.get_wallet_address(), "0x" + "22" * 20)
+        finally:
+            if original_home:
+                os.environ['HOME'] = original_home
+    
     def test_scripts_dir_exists(self):
         """Scripts directory should exist."""
         self.assertTrue(cli.SCRIPTS_DIR.exists())
@@ -41,6 +68,11 @@ class TestCliModuleFunctions(unittest.TestCase):
         """Should be able to load cow_swap module."""
         module = cli.load_script("cow_swap")
         self.assertTrue(hasattr(module, 'main') or hasattr(module, 'run'))
+    
+    def test_load_script_caches_module(self):
+        """Repeated loads should return the same module object."""
+        first = cli.load_script("cow_swap")
+        self.assertIs(cli.load_script("cow_swap"), first)
 
 
 class TestCliCommands(unittest.TestCase):
@@ -67,6 +99,109 @@ class TestCliCommands(unittest.TestCase):
         self.assertTrue(callable(cli.cmd_vps))
 
 
+class TestFastParse(unittest.TestCase):
+    """Tests for the argparse-free argument fast path."""
+    
+    def test_plain_command(self):
+        """Commands without arguments should parse directly."""
+        args = cli.fast_parse(["status"])
+        self.assertEqual(args.command, "status")
+        self.assertIs(args.func, cli.cmd_status)
+    
+    def test_swap_with_amount(self):
+        """Swap action and amount should match the argparse namespace."""
+        args = cli.fast_parse(["swap", "execute", "0.5"])
+        self.assertIs(args.func, cli.cmd_swap)
+        self.assertEqual(args.action, "execute")
+        self.assertEqual(args.amount, "0.5")
+    
+    def test_provision_defaults(self):
+        """A bare host should default to the provision action as root."""
+        args = cli.fast_parse(["provision", "10.0.0.1"])
+        self.assertEqual(args.action, "provision")
+        self.assertEqual(args.host, "10.0.0.1")
+        self.assertEqual(args.user, "root")
+        self.assertIsNone(args.key)
+    
+    def test_falls_back_to_argparse(self):
+        """Options, help and invalid input should use the full parser."""
+        self.assertIsNone(cli.fast_parse([]))
+        self.assertIsNone(cli.fast_parse(["--help"]))
+        self.assertIsNone(cli.fast_parse(["swap", "bogus"]))
+        self.assertIsNone(cli.fast_parse(["provision", "check", "host", "-u", "admin"]))
+
+
+class TestMain(unittest.TestCase):
+    """Tests for main() run in-process with an explicit argv."""
+    
+    def run_cli(self, *args):
+        """Run cli.main(args); returns (exit code, stdout)."""
+        from contextlib import redirect_stdout, redirect_stderr
+        out = StringIO()
+        code = 0
+        with redirect_stdout(out), redirect_stderr(StringIO()):
+            try:
+                cli.main(list(args))
+            except SystemExit as e:
+                code = e.code or 0
+        return code, out.getvalue()
+    
+    def test_help_lists_commands(self):
+        """--help should list every subcommand and exit cleanly."""
+        code, output = self.run_cli("--help")
+        self.assertEqual(code, 0)
+        for command in cli.COMMANDS:
+            self.assertIn(command, output)
+    
+    def test_no_command_prints_help(self):
+        """No arguments should print the top-level help."""
+        code, output = self.run_cli()
+        self.assertEqual(code, 0)
+        self.assertIn("usage:", output)
+    
+    def test_invalid_action_exits_with_error(self):
+        """An unknown action should be rejected by argparse."""
+        code, _ = self.run_cli("swap", "bogus")
+        self.assertEqual(code, 2)
+
+
+class TestRenderStatus(unittest.TestCase):
+    """Tests for the status dashboard rendering."""
+    
+    def render(self, **overrides):
+        from datetime import datetime, timezone
+        from contextlib import redirect_stdout
+        state = {
+            "time": datetime(2026, 2, 8, tzinfo=timezone.utc),
+            "address": "0x643fc612b928ee9C58B8C9F1DF017E75757Be3D4",
+            "polygon_usdc": 10.0,
+            "base_eth": 0.01,
+            "edis": "ok",
+        }
+        state.update(overrides)
+        out = StringIO()
+        with redirect_stdout(out):
+            cli.render_status(state)
+        return out.getvalue()
+    
+    def test_all_prerequisites_met(self):
+        """Wallet, funds and EDIS account should report VPS ready."""
+        self.assertIn("VPS READY", self.render())
+    
+    def test_insufficient_funds(self):
+        """Low Polygon USDC should block on funds."""
+        output = self.render(polygon_usdc=1.0)
+        self.assertIn("Need more funds", output)
+        self.assertIn("Bridge more USDC", output)
+    
+    def test_missing_wallet(self):
+        """No wallet should skip balances entirely."""
+        output = self.render(address=None, polygon_usdc=None, base_eth=None)
+        self.assertIn("Wallet: Not configured", output)
+        self.assertNotIn("Polygon USDC", output)
+        self.assertIn("Multiple prerequisites missing", output)
+
+
 class TestGetBalance(unittest.TestCase):
     """Tests for the get_balance RPC function."""
     
@@ -92,5 +227,50 @@ class TestGetBalance(unittest.TestCase):
         self.assertIsNone(result)
 
 
+class TestGetBalancesBatch(unittest.TestCase):
+    """Tests for get_balances_batch against a local RPC."""
+    
+    ADDRESS = '0x0000000000000000000000000000000000000001'
+    USDC = '0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913'
+    TOKENS = [('ETH', None, 18), ('USDC', USDC, 6)]
+    # 1 ETH and 2.5 USDC in base units
+    RAW = {'eth_getBalance': hex(10**18), 'eth_call': hex(2_500_000)}
+    
+    def serve(self, reply):
+        rpc = LocalRPC(reply)
+        self.addCleanup(rpc.close)
+        self.addCleanup(cli._rpc_idle.clear)
+        return rpc
+    
+    def result_for(self, call):
+        return {'jsonrpc': '2.0', 'id': call['id'], 'result': self.RAW[call['method']]}
+    
+    def test_out_of_order_replies_are_matched_by_id(self):
+        """Each balance should come from the reply with its request id."""
+        rpc = self.serve(lambda payload: [self.result_for(c) for c in reversed(payload)])
+        balances = cli.get_balances_batch(rpc.url, self.ADDRESS, self.TOKENS)
+        self.assertEqual(balances, {'ETH': 1.0, 'USDC': 2.5})
+        self.assertEqual(len(rpc.payloads), 1)
+    
+    def test_missing_reply_is_none(self):
+        """A reply dropped from the batch should leave only that balance unknown."""
+        rpc = self.serve(lambda payload: [self.result_for(payload[1])])
+        balances = cli.get_balances_batch(rpc.url, self.ADDRESS, self.TOKENS)
+        self.assertEqual(balances, {'ETH': None, 'USDC': 2.5})
+    
+    def test_rejected_batch_falls_back_to_single_calls(self):
+        """An endpoint that refuses batches should be queried per token."""
+        def reply(payload):
+            if isinstance(payload, list):
+                return {'jsonrpc': '2.0', 'id': None,
+                        'error': {'code': -32600, 'message': 'batch not supported'}}
+            return self.result_for(payload)
+        
+        rpc = self.serve(reply)
+        balances = cli.get_balances_batch(rpc.url, self.ADDRESS, self.TOKENS)
+        self.assertEqual(balances, {'ETH': 1.0, 'USDC': 2.5})
+        self.assertEqual(len(rpc.payloads), 3)
+
+
 if __name__ == '__main__':
     unittest.main()
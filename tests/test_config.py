@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Tests for configuration loading and validation."""
 import os
+import re
 import sys
 import tempfile
 import unittest
@@ -8,6 +9,9 @@ import unittest
 # Add scripts to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
 
+# 0x-prefixed, 40 hex characters (checksummed or not)
+_ADDR_RE = re.compile(r'^0x[0-9a-fA-F]{40}$')
+
 
 class TestPrivateKeyLoading(unittest.TestCase):
     """Test private key loading from files."""
@@ -62,10 +66,15 @@ class TestEthereumAddresses(unittest.TestCase):
             '0xBE3c41E1CC251422F0502442203a2C0c4F63111b',  # 0xSplits
         ]
         for addr in addresses:
-            self.assertTrue(addr.startswith('0x'))
-            self.assertEqual(len(addr), 42)
-            # Check hex characters (after 0x)
-            int(addr[2:], 16)  # Raises ValueError if not hex
+            self.assertIsNotNone(_ADDR_RE.match(addr), f"Invalid address: {addr}")
+    
+    def test_rejects_malformed_addresses(self):
+        """Wrong length, missing prefix or non-hex characters should fail."""
+        for addr in ['643fc612b928ee9C58B8C9F1DF017E75757Be3D4',
+                     '0x643fc612b928ee9C58B8C9F1DF017E75757Be3D',
+                     '0x643fc612b928ee9C58B8C9F1DF017E75757Be3DZ',
+                     '0x643fc612_928ee9C58B8C9F1DF017E75757Be3D4']:
+            self.assertIsNone(_ADDR_RE.match(addr), f"Accepted: {addr}")
 
 
 if __name__ == '__main__':
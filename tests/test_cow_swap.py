@@ -0,0 +1,197 @@
+"""Tests for cow_swap.py"""
+import importlib.util
+import sys
+import time
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add scripts and tests directories to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import cow_swap
+from local_rpc import LocalRPC
+
+
+def answer(payload, result="0x10"):
+    """Reply to a single call or a batch with result for every id."""
+    if isinstance(payload, list):
+        return [answer(call, result) for call in payload]
+    return {"jsonrpc": "2.0", "id": payload["id"], "result": result}
+
+
+@unittest.skipUnless(importlib.util.find_spec("requests"), "requests not installed")
+class RPCTestCase(unittest.TestCase):
+    """Base class that points cow_swap at local endpoints (skipped without requests)."""
+    
+    def setUp(self):
+        cow_swap._rpc_cache.clear()
+        self.addCleanup(cow_swap._rpc_cache.clear)
+    
+    def serve(self, reply, delay=0):
+        rpc = LocalRPC(reply, delay)
+        self.addCleanup(rpc.close)
+        return rpc
+    
+    def use_rpcs(self, *rpcs):
+        patcher = mock.patch.object(cow_swap, "RPC_URLS", [rpc.url for rpc in rpcs])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestRpcHedged(RPCTestCase):
+    """Tests for hedged requests across RPC_URLS."""
+    
+    def test_hung_primary_is_hedged(self):
+        """A primary that never answers in time should be overtaken after HEDGE_DELAY."""
+        hung = self.serve(answer, delay=3)
+        backup = self.serve(lambda payload: answer(payload, "0x2a"))
+        self.use_rpcs(hung, backup)
+        
+        start = time.time()
+        result = cow_swap.rpc_call("eth_blockNumber", [])
+        elapsed = time.time() - start
+        
+        self.assertEqual(result["result"], "0x2a")
+        self.assertGreaterEqual(elapsed, cow_swap.HEDGE_DELAY * 0.9)
+        self.assertLess(elapsed, cow_swap.HEDGE_DELAY + 1)
+        self.assertEqual(len(hung.payloads), 1)
+    
+    def test_failed_primary_hedges_immediately(self):
+        """An error from the primary should start the next endpoint without waiting."""
+        failing = self.serve(lambda payload: {"jsonrpc": "2.0", "id": payload["id"],
+                                              "error": {"code": -32000, "message": "down"}})
+        backup = self.serve(answer)
+        self.use_rpcs(failing, backup)
+        
+        start = time.time()
+        self.assertEqual(cow_swap.rpc_call("eth_blockNumber", [])["result"], "0x10")
+        self.assertLess(time.time() - start, cow_swap.HEDGE_DELAY)
+
+    
+    def test_write_goes_to_one_endpoint(self):
+        """A slow primary that answers a send should be the only endpoint used."""
+        slow = self.serve(lambda payload: answer(payload, "0xhash"),
+                          delay=cow_swap.HEDGE_DELAY * 2)
+        backup = self.serve(answer)
+        self.use_rpcs(slow, backup)
+        
+        self.assertEqual(cow_swap.send_raw_tx("0xsigned"), "0xhash")
+        self.assertEqual(len(slow.payloads), 1)
+        self.assertEqual(backup.payloads, [])
+
+
+class TestRpcBatch(RPCTestCase):
+    """Tests for rpc_batch."""
+    
+    CALLS = [("eth_blockNumber", []), ("eth_getTransactionCount", ["0xabc", "latest"])]
+    
+    def test_out_of_order_replies_are_matched_by_id(self):
+        """Batch replies should be returned in call order, whatever order they arrive in."""
+        rpc = self.serve(lambda payload: [
+            {"jsonrpc": "2.0", "id": call["id"], "result": call["method"]}
+            for call in reversed(payload)
+        ])
+        self.use_rpcs(rpc)
+        
+        responses = cow_swap.rpc_batch(self.CALLS)
+        self.assertEqual([r["result"] for r in responses],
+                         ["eth_blockNumber", "eth_getTransactionCount"])
+        self.assertEqual(len(rpc.payloads), 1)
+    
+    def test_rejected_batch_falls_back_to_single_calls(self):
+        """An endpoint that refuses batches should still get every call answered."""
+        def reply(payload):
+            if isinstance(payload, list):
+                return {"jsonrpc": "2.0", "id": None,
+                        "error": {"code": -32600, "message": "batch not supported"}}
+            return {"jsonrpc": "2.0", "id": payload["id"], "result": payload["method"]}
+        
+        rpc = self.serve(reply)
+        self.use_rpcs(rpc)
+        
+        responses = cow_swap.rpc_batch(self.CALLS)
+        self.assertEqual([r["result"] for r in responses],
+                         ["eth_blockNumber", "eth_getTransactionCount"])
+        self.assertIsInstance(rpc.payloads[0], list)
+        self.assertEqual([p["method"] for p in rpc.payloads[1:]],
+                         ["eth_blockNumber", "eth_getTransactionCount"])
+
+
+class FakeWebSocket:
+    """newHeads connection that confirms the subscription, then stalls."""
+    
+    def __init__(self, *args, **kwargs):
+        self.subscribed = False
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+    
+    def send(self, message):
+        pass
+    
+    def recv(self, timeout=None):
+        if not self.subscribed:
+            self.subscribed = True
+            return '{"jsonrpc": "2.0", "id": 1, "result": "0x1"}'
+        time.sleep(timeout)
+        raise TimeoutError
+
+
+def fake_websockets(connect):
+    """sys.modules entries that make `from websockets.sync.client import connect` use connect."""
+    client = types.ModuleType("websockets.sync.client")
+    client.connect = connect
+    return {
+        "websockets": types.ModuleType("websockets"),
+        "websockets.sync": types.ModuleType("websockets.sync"),
+        "websockets.sync.client": client,
+    }
+
+
+class TestWaitForTx(unittest.TestCase):
+    """Tests for wait_for_tx and its WebSocket fast path."""
+    
+    RECEIPT = {"status": "0x1", "blockNumber": "0x10"}
+    
+    def test_stalled_subscription_still_finds_receipt(self):
+        """A socket that stops pushing blocks must not hide a mined tx."""
+        mined_at = time.time() + 0.3
+        
+        def get_receipt(tx_hash):
+            return self.RECEIPT if time.time() >= mined_at else None
+        
+        with mock.patch.dict(sys.modules, fake_websockets(FakeWebSocket)), \
+                mock.patch.object(cow_swap, "get_receipt", get_receipt), \
+                mock.patch.object(cow_swap, "WS_RECV_TIMEOUT", 0.1):
+            start = time.time()
+            receipt = cow_swap.wait_for_tx("0xabc", timeout=5)
+        
+        self.assertEqual(receipt, self.RECEIPT)
+        self.assertLess(time.time() - start, 2)
+    
+    def test_final_check_after_timeout(self):
+        """A receipt seen only on the last check should still be returned."""
+        def connect(*args, **kwargs):
+            raise OSError("no WebSocket")
+        
+        with mock.patch.dict(sys.modules, fake_websockets(connect)), \
+                mock.patch.object(cow_swap, "get_receipt", return_value=self.RECEIPT):
+            self.assertEqual(cow_swap.wait_for_tx("0xabc", timeout=0), self.RECEIPT)
+    
+    def test_raises_when_never_mined(self):
+        """No receipt by the deadline should raise."""
+        with mock.patch.dict(sys.modules, fake_websockets(FakeWebSocket)), \
+                mock.patch.object(cow_swap, "get_receipt", return_value=None), \
+                mock.patch.object(cow_swap, "WS_RECV_TIMEOUT", 0.1):
+            with self.assertRaises(Exception):
+                cow_swap.wait_for_tx("0xabc", timeout=0.3, poll_interval=0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
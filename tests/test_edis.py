@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 """Tests for EDIS Global VPS order tools."""
+import asyncio
 import os
 import sys
 import unittest
+from unittest import mock
 
 # Add scripts to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
@@ -76,5 +78,74 @@ class TestEdisRegistration(unittest.TestCase):
         self.assertTrue(country.isupper())
 
 
+class TestEdisFillOne(unittest.TestCase):
+    """Test fill_one against a mocked Playwright browser."""
+    
+    @classmethod
+    def setUpClass(cls):
+        try:
+            import edis_register
+        except SystemExit:
+            raise unittest.SkipTest('Playwright not installed')
+        cls.edis_register = edis_register
+    
+    def make_browser(self):
+        """Browser mock whose context hands out one page mock."""
+        page = mock.MagicMock()
+        for name in ('goto', 'wait_for_load_state', 'evaluate', 'wait_for_function'):
+            setattr(page, name, mock.AsyncMock())
+        page.evaluate.return_value = []
+        page.locator.return_value.select_option = mock.AsyncMock()
+        ctx = mock.MagicMock()
+        ctx.new_page = mock.AsyncMock(return_value=page)
+        ctx.route = mock.AsyncMock()
+        ctx.close = mock.AsyncMock()
+        browser = mock.MagicMock()
+        browser.new_context = mock.AsyncMock(return_value=ctx)
+        return browser, ctx, page
+    
+    def fill(self, browser):
+        with mock.patch('builtins.print'):
+            return asyncio.run(self.edis_register.fill_one(
+                browser, self.edis_register.REGISTRATION_DATA, 'pw'))
+    
+    def test_returns_open_context(self):
+        """A successful fill should hand back the context and page unclosed."""
+        browser, ctx, page = self.make_browser()
+        self.assertEqual(self.fill(browser), (ctx, page))
+        ctx.close.assert_not_awaited()
+        page.locator.return_value.select_option.assert_awaited_once_with('DE')
+    
+    def test_closes_context_when_goto_fails(self):
+        """A failed navigation should close the context before re-raising."""
+        browser, ctx, page = self.make_browser()
+        page.goto.side_effect = TimeoutError('navigation timeout')
+        with self.assertRaises(TimeoutError):
+            self.fill(browser)
+        ctx.close.assert_awaited_once()
+    
+    def test_missing_state_is_allowed(self):
+        """A country without a state field should still fill."""
+        browser, ctx, page = self.make_browser()
+        page.evaluate.side_effect = [[], ['#state']]
+        self.assertEqual(self.fill(browser), (ctx, page))
+    
+    def test_missing_password_field_raises(self):
+        """A skipped required field should fail and close the context."""
+        browser, ctx, page = self.make_browser()
+        page.evaluate.side_effect = [[], ['#state', '#inputNewPassword1']]
+        with self.assertRaisesRegex(RuntimeError, '#inputNewPassword1'):
+            self.fill(browser)
+        ctx.close.assert_awaited_once()
+    
+    def test_closes_context_when_evaluate_fails(self):
+        """A failed fill script should close the context before re-raising."""
+        browser, ctx, page = self.make_browser()
+        page.evaluate.side_effect = RuntimeError('page crashed')
+        with self.assertRaises(RuntimeError):
+            self.fill(browser)
+        ctx.close.assert_awaited_once()
+
+
 if __name__ == '__main__':
     unittest.main()
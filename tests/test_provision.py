@@ -1,7 +1,12 @@
 """Tests for provision_vps.py"""
+import os
 import sys
+import tempfile
 import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
 from pathlib import Path
+from unittest import mock
 
 # Add scripts directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
@@ -12,33 +17,171 @@ import provision_vps
 class TestProvisionVPS(unittest.TestCase):
     """Tests for VPS provisioning script."""
     
+    # Packages the provision script must install (checked as whole words)
+    REQUIRED_PACKAGES = {"fail2ban", "ufw"}
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.script = provision_vps.PROVISION_COMMANDS
+        cls.check_script = provision_vps.CHECK_COMMANDS
+        cls.tokens = set(cls.script.split())
+    
     def test_provision_commands_defined(self):
         """Verify provision commands string exists and has content."""
-        self.assertIn("apt-get update", provision_vps.PROVISION_COMMANDS)
-        self.assertIn("fail2ban", provision_vps.PROVISION_COMMANDS)
-        self.assertIn("ufw", provision_vps.PROVISION_COMMANDS)
-        self.assertIn("nodejs", provision_vps.PROVISION_COMMANDS)
+        self.assertIn("apt-get update", self.script)
+        self.assertLessEqual(self.REQUIRED_PACKAGES, self.tokens)
+        self.assertIn("nodejs", self.script)
     
     def test_check_commands_defined(self):
         """Verify check commands string exists."""
-        self.assertIn("hostname", provision_vps.CHECK_COMMANDS)
-        self.assertIn("Uptime", provision_vps.CHECK_COMMANDS)
-        self.assertIn("fail2ban", provision_vps.CHECK_COMMANDS)
+        self.assertIn("hostname", self.check_script)
+        self.assertIn("Uptime", self.check_script)
+        self.assertIn("fail2ban", self.check_script)
+    
+    def test_dpkg_conffile_prompts_are_answered(self):
+        """Upgrade and install should not stop at dpkg conffile prompts."""
+        self.assertIn("--force-confdef", self.script)
+        self.assertIn("apt-get upgrade -y $DPKG_CONF", self.script)
+        self.assertIn("--no-install-recommends $DPKG_CONF", self.script)
     
     def test_creates_noctiluca_user(self):
         """Verify provision creates 'noctiluca' user."""
-        self.assertIn("useradd -m -s /bin/bash -G sudo noctiluca", 
-                     provision_vps.PROVISION_COMMANDS)
+        self.assertIn("useradd -m -s /bin/bash -G sudo noctiluca", self.script)
     
     def test_ssh_hardening(self):
         """Verify SSH hardening is configured."""
-        self.assertIn("PermitRootLogin no", provision_vps.PROVISION_COMMANDS)
-        self.assertIn("PasswordAuthentication no", provision_vps.PROVISION_COMMANDS)
+        self.assertIn("PermitRootLogin no", self.script)
+        self.assertIn("PasswordAuthentication no", self.script)
     
     def test_firewall_configured(self):
         """Verify UFW firewall is set up."""
-        self.assertIn("ufw default deny incoming", provision_vps.PROVISION_COMMANDS)
-        self.assertIn("ufw allow ssh", provision_vps.PROVISION_COMMANDS)
+        self.assertIn("ufw default deny incoming", self.script)
+        self.assertIn("ufw allow ssh", self.script)
+    
+    def test_build_provision_script_is_cached(self):
+        """Same arguments should return the same rendered script."""
+        script = provision_vps.build_provision_script("admin", 20, ("git",))
+        self.assertIs(provision_vps.build_provision_script("admin", 20, ("git",)), script)
+        self.assertIn("useradd -m -s /bin/bash -G sudo admin", script)
+        self.assertIn("NODE_MAJOR=20", script)
+
+
+
+class TestProvisionArgs(unittest.TestCase):
+    """Tests for provision_vps.main() argument handling."""
+    
+    def run_main(self, *argv):
+        """Run main(argv) with SSH stubbed out; returns (exit code, hosts run)."""
+        calls = []
+        
+        def fake_run_ssh_hosts(hosts, commands, user="root", key=None):
+            calls.append(list(hosts))
+            return {host: True for host in hosts}
+        
+        code = 0
+        with mock.patch.object(provision_vps, "run_ssh_hosts", fake_run_ssh_hosts), \
+                redirect_stdout(StringIO()), redirect_stderr(StringIO()):
+            try:
+                provision_vps.main(list(argv))
+            except SystemExit as e:
+                code = e.code or 0
+        return code, calls
+    
+    def test_misspelled_action_is_rejected(self):
+        """A typo'd action must not be provisioned as a host."""
+        code, calls = self.run_main("chekc", "h")
+        self.assertNotEqual(code, 0)
+        self.assertEqual(calls, [])
+    
+    def test_several_hosts_need_an_action(self):
+        """Leaving the action out is only allowed for a single host."""
+        code, calls = self.run_main("h1", "h2")
+        self.assertNotEqual(code, 0)
+        self.assertEqual(calls, [])
+    
+    def test_single_host_defaults_to_provision(self):
+        """A bare host should still be provisioned."""
+        code, calls = self.run_main("h")
+        self.assertEqual(code, 0)
+        self.assertEqual(calls, [["h"]])
+    
+    def test_explicit_action_with_several_hosts(self):
+        """An explicit action should run on every host."""
+        code, calls = self.run_main("check", "h1", "h2")
+        self.assertEqual(code, 0)
+        self.assertEqual(calls, [["h1", "h2"]])
+
+
+class TestRunSshHosts(unittest.TestCase):
+    """Tests for the run_ssh_hosts output loop, using a fake ssh on PATH."""
+    
+    # Stands in for ssh: exposes the target host and runs stdin locally
+    FAKE_SSH = """#!/bin/sh
+for arg; do
+    case "$arg" in *@*) TARGET="${arg#*@}" ;; esac
+done
+export TARGET
+exec bash -s
+"""
+    
+    # Splits a line across writes, and ends without a newline
+    COMMANDS = """printf 'hello '
+sleep 0.2
+printf '%s\\nlast' "$TARGET"
+[ "$TARGET" != bad ]
+"""
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        ssh = self.tmp / "ssh"
+        ssh.write_text(self.FAKE_SSH)
+        ssh.chmod(0o755)
+        path = f"{self.tmp}{os.pathsep}{os.environ.get('PATH', '')}"
+        for patcher in (
+            mock.patch.dict(os.environ, {"PATH": path}),
+            mock.patch.object(provision_vps, "LOG_DIR", self.tmp / "logs"),
+            mock.patch.object(provision_vps, "_ensure_masters",
+                              lambda hosts, user, key: {host: True for host in hosts}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def test_lines_and_exit_codes(self):
+        """Output should be reassembled into lines and exit codes reported per host."""
+        out = StringIO()
+        with redirect_stdout(out):
+            results = provision_vps.run_ssh_hosts(["good", "bad"], self.COMMANDS)
+        self.assertEqual(results, {"good": True, "bad": False})
+        
+        lines = out.getvalue().splitlines()
+        for host in ("good", "bad"):
+            # The split write comes out as one line, the unterminated tail on EOF
+            self.assertIn(f"[{host}] hello {host}", lines)
+            self.assertIn(f"[{host}] last", lines)
+            log = provision_vps.host_log_path(host).read_text()
+            self.assertEqual(log, f"hello {host}\nlast")
+    
+    def test_stdin_readers_do_not_eat_the_script(self):
+        """A command reading stdin must not swallow the lines after it."""
+        commands = "echo one\nhead -n1 >/dev/null\necho two\n"
+        out = StringIO()
+        with redirect_stdout(out):
+            results = provision_vps.run_ssh_hosts(["good"], commands)
+        self.assertEqual(results, {"good": True})
+        self.assertEqual(out.getvalue().splitlines()[-2:], ["[good] one", "[good] two"])
+    
+    def test_unreachable_host_is_not_run(self):
+        """A host without a master connection should fail without a session."""
+        connected = lambda hosts, user, key: {"good": True, "down": False}
+        out = StringIO()
+        with mock.patch.object(provision_vps, "_ensure_masters", connected), \
+                redirect_stdout(out):
+            results = provision_vps.run_ssh_hosts(["good", "down"], self.COMMANDS)
+        self.assertEqual(results, {"good": True, "down": False})
+        self.assertNotIn("[down]", out.getvalue())
+        self.assertFalse(provision_vps.host_log_path("down").exists())
 
 
 if __name__ == "__main__":